@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+LinUCB Arm Storage
+==================
+
+Per-arm LinUCB state and its binary encoding in SQLite.
+
+Every matrix/vector is stored as a BLOB: a small header followed by the raw
+little-endian array data, so loading an arm is a zero-copy ``np.frombuffer``
+instead of parsing thousands of floats from JSON text.
+
+Header layout (little-endian, padded to a multiple of 8 bytes):
+    4s  magic  b"LUCB"
+    B   format version (ARRAY_FORMAT_VERSION)
+    c   dtype code ('d' float64, 'f' float32)
+    B   number of dimensions
+    x   padding
+    I*  one uint32 per dimension
+
+``ArmStore`` keeps every arm in memory and persists changed arms to SQLite in
+batched transactions (write-behind). Feedback is durable as soon as its
+interaction row is written: arms are flushed together with the id of the
+last interaction they include, and interactions after it are replayed on
+startup.
+"""
+
+import atexit
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from sqlite_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Learning database (interactions and arms)
+DEFAULT_DB_PATH = os.environ.get("MATCHMAKING_DB_PATH", "matchmaking_learning.db")
+
+ARRAY_MAGIC = b"LUCB"
+ARRAY_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sBcBx")
+_DTYPES = {b"d": np.dtype("<f8"), b"f": np.dtype("<f4")}
+
+# float64 keeps the Sherman–Morrison updates as precise as the JSON rows were
+ARM_DTYPE = np.float64
+
+
+@dataclass
+class ArmParameters:
+    """LinUCB state of one arm: A, b and the maintained A⁻¹ and θ = A⁻¹b"""
+    A: np.ndarray
+    b: np.ndarray
+    A_inv: np.ndarray
+    theta: np.ndarray
+    updates_since_inversion: int = 0
+
+    @classmethod
+    def initial(cls, context_dim: int) -> "ArmParameters":
+        """Parameters of an arm without feedback (A = I, b = 0)"""
+        return cls(np.eye(context_dim), np.zeros(context_dim), np.eye(context_dim), np.zeros(context_dim))
+
+    def reinvert(self):
+        """Recompute A⁻¹ and θ exactly, discarding accumulated rounding drift"""
+        try:
+            self.A_inv = np.linalg.inv(self.A)
+        except np.linalg.LinAlgError:
+            self.A_inv = np.linalg.pinv(self.A)
+        self.theta = self.A_inv @ self.b
+        self.updates_since_inversion = 0
+
+    def update(self, context_vector: np.ndarray, reward: float, reinversion_interval: int = 0):
+        """Apply A += xxᵀ, b += r·x, updating A⁻¹ with Sherman–Morrison
+
+        Every ``reinversion_interval`` updates A⁻¹ is recomputed exactly
+        instead (0 disables the periodic re-inversion). New arrays are
+        assigned rather than modified in place, so read-only views loaded
+        from storage can be updated directly.
+        """
+        x = np.asarray(context_vector, dtype=np.float64)
+        self.A = self.A + np.outer(x, x)
+        self.b = self.b + reward * x
+        self.updates_since_inversion += 1
+
+        if reinversion_interval and self.updates_since_inversion >= reinversion_interval:
+            self.reinvert()
+            return
+
+        # (A + xxᵀ)⁻¹ = A⁻¹ - (A⁻¹x)(A⁻¹x)ᵀ / (1 + xᵀA⁻¹x), as A⁻¹ is symmetric
+        A_inv_x = self.A_inv @ x
+        self.A_inv = self.A_inv - np.outer(A_inv_x, A_inv_x) / (1.0 + x @ A_inv_x)
+        self.theta = self.A_inv @ self.b
+
+
+def encode_array(array: np.ndarray, dtype=ARM_DTYPE) -> bytes:
+    """Header plus raw little-endian data of an array"""
+    array = np.ascontiguousarray(array, dtype=np.dtype(dtype).newbyteorder("<"))
+    code = b"d" if array.dtype.itemsize == 8 else b"f"
+    header = _HEADER.pack(ARRAY_MAGIC, ARRAY_FORMAT_VERSION, code, array.ndim)
+    header += struct.pack(f"<{array.ndim}I", *array.shape)
+    header += b"\0" * (-len(header) % 8)
+    return header + array.tobytes()
+
+
+def decode_array(blob: bytes) -> np.ndarray:
+    """Read-only array viewing the data of an encode_array blob (no copy)"""
+    magic, version, code, ndim = _HEADER.unpack_from(blob)
+    if magic != ARRAY_MAGIC or version != ARRAY_FORMAT_VERSION or code not in _DTYPES:
+        raise ValueError(f"Unsupported arm array encoding (magic={magic!r}, version={version})")
+    shape = struct.unpack_from(f"<{ndim}I", blob, _HEADER.size)
+    offset = _HEADER.size + 4 * ndim
+    offset += -offset % 8
+    count = int(np.prod(shape)) if ndim else 1
+    return np.frombuffer(blob, dtype=_DTYPES[code], count=count, offset=offset).reshape(shape)
+
+
+def encode_arm(arm: ArmParameters) -> Tuple[bytes, bytes, bytes, bytes, int]:
+    """Column values (A, b, A⁻¹, θ, updates since inversion) for the arm_parameters table"""
+    return (encode_array(arm.A), encode_array(arm.b), encode_array(arm.A_inv), encode_array(arm.theta),
+            arm.updates_since_inversion)
+
+
+def decode_arm(row: Tuple) -> ArmParameters:
+    """ArmParameters from (A, b, A⁻¹, θ, updates since inversion) column values"""
+    return ArmParameters(decode_array(row[0]), decode_array(row[1]), decode_array(row[2]),
+                         decode_array(row[3]), row[4] or 0)
+
+
+def decode_context_vector(value) -> np.ndarray:
+    """Context vector of an interactions row: a binary BLOB, or JSON text in rows from older versions"""
+    if isinstance(value, (bytes, memoryview)):
+        return decode_array(bytes(value))
+    return np.array(json.loads(value), dtype=np.float32)
+
+
+def _create_binary_arm_table(cursor: sqlite3.Cursor, table: str = "arm_parameters"):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            internship_id TEXT PRIMARY KEY,
+            A_matrix BLOB,
+            b_vector BLOB,
+            A_inverse BLOB,
+            theta_vector BLOB,
+            updates_since_inversion INTEGER DEFAULT 0,
+            last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _table_columns(cursor: sqlite3.Cursor, table: str) -> Dict[str, str]:
+    """Column name -> declared type of a table (empty if it does not exist)"""
+    return {row[1]: (row[2] or "").upper() for row in cursor.execute(f"PRAGMA table_info({table})")}
+
+
+def create_arm_table(cursor: sqlite3.Cursor):
+    """Create the binary arm_parameters table, migrating a JSON-text one if present
+
+    The migration runs in its own transaction, so call this outside one.
+    """
+    columns = _table_columns(cursor, "arm_parameters")
+    legacy = columns.get("A_matrix") == "TEXT"
+    # A JSON table left next to the binary one by an interrupted non-atomic migration
+    orphaned = not legacy and bool(_table_columns(cursor, "arm_parameters_json"))
+
+    if legacy or orphaned:
+        # Rename, create, copy and drop commit together or not at all
+        cursor.execute("BEGIN")
+        try:
+            if legacy:
+                cursor.execute("ALTER TABLE arm_parameters RENAME TO arm_parameters_json")
+            else:
+                columns = _table_columns(cursor, "arm_parameters_json")
+            _create_binary_arm_table(cursor)
+            # When recovering, arms learned since the interruption win over their JSON rows
+            migrated = _migrate_json_arms(cursor, columns, replace=legacy)
+            cursor.execute("DROP TABLE arm_parameters_json")
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        logger.info(f"Migrated {migrated} LinUCB arms from JSON text to binary storage")
+    else:
+        _create_binary_arm_table(cursor)
+
+    # Id of the last interaction reflected in the stored arms (see ArmStore)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bandit_metadata (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    ''')
+
+
+def replace_arm_table(conn: sqlite3.Connection, arms: Dict[str, ArmParameters], watermark: int):
+    """Atomically replace every stored arm (and the interaction watermark) with ``arms``
+
+    The new arms are written to a side table which is renamed over
+    arm_parameters in the same transaction, so readers see either the old
+    or the new set, never a mix. Call it outside a transaction.
+    """
+    # Explicit: sqlite3 would run the DDL below in autocommit mode
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DROP TABLE IF EXISTS arm_parameters_new")
+        _create_binary_arm_table(conn.cursor(), "arm_parameters_new")
+        conn.executemany(
+            "INSERT INTO arm_parameters_new (internship_id, A_matrix, b_vector, A_inverse, theta_vector, "
+            "updates_since_inversion) VALUES (?, ?, ?, ?, ?, ?)",
+            ((internship_id, *encode_arm(arm)) for internship_id, arm in arms.items())
+        )
+        conn.execute("DROP TABLE arm_parameters")
+        conn.execute("ALTER TABLE arm_parameters_new RENAME TO arm_parameters")
+        conn.execute("INSERT OR REPLACE INTO bandit_metadata (key, value) VALUES (?, ?)",
+                     (ArmStore.WATERMARK_KEY, watermark))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _migrate_json_arms(cursor: sqlite3.Cursor, columns, replace: bool = True) -> int:
+    """Copy every JSON arm row into the binary table (inverting arms stored without A⁻¹)
+
+    With ``replace=False`` arms already in the binary table are kept.
+    """
+    has_inverse = "A_inverse" in columns and "theta_vector" in columns
+    select = ("SELECT internship_id, A_matrix, b_vector, A_inverse, theta_vector, updates_since_inversion, "
+              "last_updated FROM arm_parameters_json" if has_inverse else
+              "SELECT internship_id, A_matrix, b_vector, NULL, NULL, 0, last_updated FROM arm_parameters_json")
+
+    migrated = 0
+    for internship_id, A_json, b_json, A_inv_json, theta_json, updates, last_updated in cursor.execute(select).fetchall():
+        A = np.array(json.loads(A_json), dtype=np.float64)
+        b = np.array(json.loads(b_json), dtype=np.float64)
+        if A_inv_json is None or theta_json is None:
+            arm = ArmParameters(A, b, None, None)
+            arm.reinvert()
+        else:
+            arm = ArmParameters(A, b, np.array(json.loads(A_inv_json), dtype=np.float64),
+                                np.array(json.loads(theta_json), dtype=np.float64), updates or 0)
+        cursor.execute(
+            f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO arm_parameters (internship_id, A_matrix, "
+            "b_vector, A_inverse, theta_vector, updates_since_inversion, last_updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (internship_id, *encode_arm(arm), last_updated)
+        )
+        migrated += cursor.rowcount
+    return migrated
+
+
+class ArmStore:
+    """In-memory LinUCB arms with write-behind persistence to SQLite
+
+    Reads never touch the database. Updates replace the arm object (readers
+    see either the old or the new state, never a mix) and mark it dirty;
+    dirty arms are written in one transaction every ``flush_interval``
+    seconds, as soon as ``max_dirty`` arms are pending, and on ``close()``.
+    Persisted state therefore lags memory by at most ``flush_interval``.
+
+    Crash safety: callers record each interaction durably before applying it
+    (see ``update``). A flush stores the id of the last applied interaction
+    in the same transaction as the arms, and ``load`` replays every later
+    interaction, so no committed feedback is lost.
+    """
+
+    WATERMARK_KEY = "flushed_interaction_id"
+
+    def __init__(self, db_path: str, context_dim: int, reinversion_interval: int = 0,
+                 flush_interval: float = 2.0, max_dirty: int = 1000, pool: Optional[ConnectionPool] = None):
+        self.db_path = db_path
+        self.pool = pool if pool is not None else ConnectionPool(db_path)
+        self.context_dim = context_dim
+        self.reinversion_interval = reinversion_interval
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+
+        self._arms: Dict[str, ArmParameters] = {}
+        self._dirty: Dict[str, ArmParameters] = {}
+        self._applied_interaction_id = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Shared state of every arm without feedback; never modified in place
+        self._initial = ArmParameters.initial(context_dim)
+        for array in (self._initial.A, self._initial.b, self._initial.A_inv, self._initial.theta):
+            array.flags.writeable = False
+
+    def load(self):
+        """Load every stored arm and replay interactions that were not flushed yet"""
+        conn = self.pool.connection()
+        rows = conn.execute(
+            "SELECT internship_id, A_matrix, b_vector, A_inverse, theta_vector, updates_since_inversion "
+            "FROM arm_parameters"
+        ).fetchall()
+        arms = {row[0]: decode_arm(row[1:]) for row in rows}
+
+        watermark = conn.execute("SELECT value FROM bandit_metadata WHERE key = ?",
+                                 (self.WATERMARK_KEY,)).fetchone()
+        if watermark is not None:
+            watermark = watermark[0]
+        else:
+            # No watermark yet: the database predates write-behind, when every arm was
+            # stored synchronously and already includes every logged interaction
+            with conn:
+                watermark = conn.execute("SELECT COALESCE(MAX(id), 0) FROM interactions").fetchone()[0]
+                conn.execute("INSERT OR IGNORE INTO bandit_metadata (key, value) VALUES (?, ?)",
+                             (self.WATERMARK_KEY, watermark))
+        replayed = {}
+        for interaction_id, internship_id, context_vector, reward in conn.execute(
+            "SELECT id, internship_id, context_vector, reward FROM interactions WHERE id > ? ORDER BY id",
+            (watermark,)
+        ):
+            arm = dataclasses.replace(arms.get(internship_id, self._initial))
+            arm.update(decode_context_vector(context_vector), reward, self.reinversion_interval)
+            arms[internship_id] = replayed[internship_id] = arm
+            watermark = interaction_id
+
+        with self._lock:
+            self._arms = arms
+            self._applied_interaction_id = watermark
+            self._dirty = replayed
+        logger.info(f"Loaded {len(arms)} LinUCB arms ({len(replayed)} replayed from unflushed interactions)")
+        if replayed:
+            self.flush()
+
+    def swap(self, arms: Dict[str, ArmParameters], trained_through: int):
+        """Replace every arm with ``arms``, trained on the interactions with id <= ``trained_through``
+
+        Interactions applied since then are replayed on top, and the new set
+        is written to the database atomically, while updates wait. Pass
+        ``applied_interaction_id`` as read before training started.
+        """
+        with self._flush_lock, self._lock:
+            arms = dict(arms)
+            conn = self.pool.connection()
+            for _, internship_id, context_vector, reward in conn.execute(
+                "SELECT id, internship_id, context_vector, reward FROM interactions WHERE id > ? AND id <= ? "
+                "ORDER BY id",
+                (trained_through, self._applied_interaction_id)
+            ):
+                arm = dataclasses.replace(arms.get(internship_id, self._initial))
+                arm.update(decode_context_vector(context_vector), reward, self.reinversion_interval)
+                arms[internship_id] = arm
+
+            replace_arm_table(conn, arms, self._applied_interaction_id)
+            self._arms = arms
+            self._dirty = {}
+        logger.info(f"Swapped in {len(arms)} retrained LinUCB arms")
+
+    @property
+    def applied_interaction_id(self) -> int:
+        """Id of the last interaction reflected in the in-memory arms"""
+        return self._applied_interaction_id
+
+    def get(self, internship_id: str) -> ArmParameters:
+        """Current parameters of an arm (treat as read-only)"""
+        return self._arms.get(internship_id, self._initial)
+
+    def update(self, internship_id: str, context_vector: np.ndarray, reward: float,
+               interaction_id: Optional[int] = None):
+        """Apply one feedback event
+
+        ``interaction_id`` is the id of the already committed interactions row
+        for this event; interactions must be applied in id order (the
+        interaction log's writer thread does).
+        """
+        with self._lock:
+            arm = dataclasses.replace(self._arms.get(internship_id, self._initial))
+            arm.update(context_vector, reward, self.reinversion_interval)
+            self._arms[internship_id] = arm
+            self._dirty[internship_id] = arm
+            if interaction_id is not None:
+                self._applied_interaction_id = max(self._applied_interaction_id, interaction_id)
+            flush_now = len(self._dirty) >= self.max_dirty
+        if flush_now:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all dirty arms and the interaction watermark in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                watermark = self._applied_interaction_id
+            if not dirty:
+                return 0
+
+            try:
+                conn = self.pool.connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO arm_parameters (internship_id, A_matrix, b_vector, A_inverse, "
+                        "theta_vector, updates_since_inversion, last_updated) "
+                        "VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+                        [(internship_id, *encode_arm(arm)) for internship_id, arm in dirty.items()]
+                    )
+                    conn.execute("INSERT OR REPLACE INTO bandit_metadata (key, value) VALUES (?, ?)",
+                                 (self.WATERMARK_KEY, watermark))
+            except Exception as e:
+                logger.error(f"Error flushing LinUCB arms: {e}")
+                # Keep them dirty; newer updates of the same arm win
+                with self._lock:
+                    self._dirty = {**dirty, **self._dirty}
+                return 0
+            return len(dirty)
+
+    def __contains__(self, internship_id: str) -> bool:
+        """Whether the arm has received any feedback"""
+        return internship_id in self._arms
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def start(self):
+        """Start the background flush timer (and flush again at interpreter exit)"""
+        if self._thread is None and self.flush_interval:
+            self._thread = threading.Thread(target=self._flush_loop, name="arm-store-flush", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the timer and flush pending arms"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._arms)
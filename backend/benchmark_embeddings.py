@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Embedding Benchmarks
+====================
+
+``backends``: compares the inference backends from ``embedding_backends.py``
+on the same synthetic internship texts and reports, per backend:
+- model load time
+- peak resident memory of the process
+- batch throughput (texts/second)
+- single-query latency (p50/p95), i.e. encoding one student skill profile
+- cosine agreement with the PyTorch reference, checked against the
+  documented tolerance
+
+``models``: compares candidate embedding models on ranking quality against
+speed. Synthetic students are ranked against synthetic internships; quality is
+NDCG@k with the number of shared skills as graded relevance, plus recall@k
+against the first (reference) model's ranking.
+
+Each backend/model runs in its own process so memory numbers are not
+polluted by the others.
+
+Usage:
+    python benchmark_embeddings.py backends --backends torch onnx onnx-int8 --num-texts 2000
+    python benchmark_embeddings.py models --models all-MiniLM-L6-v2 paraphrase-MiniLM-L3-v2
+"""
+
+import argparse
+import multiprocessing as mp
+import random
+import resource
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from embedding_backends import (
+    BACKENDS,
+    DEFAULT_MODEL,
+    ONNX_FP32_COSINE_TOLERANCE,
+    ONNX_INT8_COSINE_TOLERANCE,
+    create_embedding_backend,
+)
+from matchmaking_system import SBERTEmbeddingService
+
+TOLERANCES = {
+    "onnx": ONNX_FP32_COSINE_TOLERANCE,
+    "onnx-int8": ONNX_INT8_COSINE_TOLERANCE,
+}
+
+SKILLS = [
+    "Python", "Java", "JavaScript", "React", "Node.js", "SQL", "MongoDB", "Machine Learning",
+    "Deep Learning", "TensorFlow", "PyTorch", "Data Analysis", "Excel", "Tableau", "Statistics",
+    "Docker", "Kubernetes", "AWS", "Figma", "UI/UX Design", "Marketing", "Content Writing",
+    "Financial Modelling", "Communication", "C++", "Embedded Systems", "AutoCAD", "Go",
+]
+
+PHRASES = [
+    "Work with the team to build", "Assist in developing", "Analyze data and prepare reports for",
+    "Design and implement", "Support the rollout of", "Research and prototype",
+]
+
+OBJECTS = [
+    "recommendation systems", "web applications", "mobile apps", "dashboards for management",
+    "data pipelines", "marketing campaigns", "embedded firmware", "cloud infrastructure",
+]
+
+
+CANDIDATE_MODELS = [
+    "all-MiniLM-L6-v2",
+    "paraphrase-MiniLM-L3-v2",
+    "all-MiniLM-L12-v2",
+    "all-mpnet-base-v2",
+]
+
+
+def sample_internships(num_internships: int, seed: int = 42) -> Tuple[List[List[str]], List[str]]:
+    """Deterministic internships as (skill lists, texts fed to the model)"""
+    rng = random.Random(seed)
+    skill_sets, texts = [], []
+    for _ in range(num_internships):
+        skills = rng.sample(SKILLS, rng.randint(2, 6))
+        description = f"{rng.choice(PHRASES)} {rng.choice(OBJECTS)}. " * rng.randint(1, 4)
+        skill_sets.append(skills)
+        texts.append(SBERTEmbeddingService.build_internship_text(skills, description.strip()))
+    return skill_sets, texts
+
+
+def sample_texts(num_texts: int, seed: int = 42) -> List[str]:
+    """Deterministic internship-like texts (skills followed by a description)"""
+    return sample_internships(num_texts, seed)[1]
+
+
+def sample_students(num_students: int, seed: int = 7) -> Tuple[List[List[str]], List[str]]:
+    """Deterministic student skill profiles as (skill lists, texts fed to the model)"""
+    rng = random.Random(seed)
+    skill_sets = [rng.sample(SKILLS, rng.randint(2, 5)) for _ in range(num_students)]
+    texts = [" ".join(skills) for skills in skill_sets]
+    return skill_sets, texts
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_backend(model_name: str, backend: str, texts: List[str], batch_size: int,
+                num_queries: int, num_reference: int) -> Dict:
+    """Benchmark a single backend (runs in a child process)"""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    model = create_embedding_backend(model_name, backend)
+    load_seconds = time.perf_counter() - start
+
+    # Warm up so lazy initialisation is not counted as inference time
+    model.encode(texts[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    model.encode(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:num_queries]:
+        start = time.perf_counter()
+        model.encode([text], batch_size=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "backend": backend,
+        "load_s": load_seconds,
+        "rss_mb": peak_rss_mb() - rss_before,
+        "throughput": len(texts) / batch_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "embeddings": model.encode(texts[:num_reference], batch_size=batch_size),
+    }
+
+
+def run_model(model_name: str, backend: str, internship_texts: List[str], student_texts: List[str],
+              batch_size: int, k: int) -> Dict:
+    """Rank internships for every student with one model (runs in a child process)"""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    model = create_embedding_backend(model_name, backend)
+    load_seconds = time.perf_counter() - start
+
+    model.encode(internship_texts[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    internship_embeddings = model.encode(internship_texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - start
+
+    latencies, student_embeddings = [], []
+    for text in student_texts:
+        start = time.perf_counter()
+        student_embeddings.append(model.encode([text], batch_size=1)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    top_k = []
+    for student_embedding in student_embeddings:
+        scores = SBERTEmbeddingService.cosine_scores(student_embedding, internship_embeddings)
+        top_k.append(np.argsort(-scores, kind="stable")[:k])
+
+    return {
+        "model": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "load_s": load_seconds,
+        "rss_mb": peak_rss_mb() - rss_before,
+        "throughput": len(internship_texts) / batch_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "top_k": np.array(top_k),
+    }
+
+
+def ndcg_at_k(ranking: np.ndarray, relevance: np.ndarray) -> float:
+    """NDCG of a ranking given graded relevance for every item"""
+    k = len(ranking)
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = float((relevance[ranking] * discounts).sum())
+    ideal = float((np.sort(relevance)[::-1][:k] * discounts).sum())
+    return dcg / ideal if ideal > 0 else 0.0
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two embedding matrices"""
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return (reference * candidate).sum(axis=1) / np.clip(norms, 1e-12, None)
+
+
+def benchmark_backends(args) -> int:
+    """Compare inference backends for one model"""
+    texts = sample_texts(args.num_texts)
+    backends = args.backends if "torch" in args.backends else ["torch"] + args.backends
+
+    ctx = mp.get_context("spawn")
+    results = {}
+    for backend in backends:
+        with ctx.Pool(1) as pool:
+            results[backend] = pool.apply(run_backend, (
+                args.model, backend, texts, args.batch_size, args.num_queries, args.num_reference
+            ))
+
+    print(f"\nModel: {args.model}  texts: {len(texts)}  batch size: {args.batch_size}\n")
+    print(f"{'backend':<10} {'load s':>7} {'RSS MB':>8} {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'min cos':>9} {'mean cos':>9}")
+
+    reference = results["torch"]["embeddings"]
+    within_tolerance = True
+    for backend in backends:
+        result = results[backend]
+        agreement = cosine_agreement(reference, result["embeddings"])
+        tolerance = TOLERANCES.get(backend)
+        if tolerance is not None and agreement.min() < 1 - tolerance:
+            within_tolerance = False
+        print(f"{backend:<10} {result['load_s']:>7.2f} {result['rss_mb']:>8.0f} {result['throughput']:>9.0f} "
+              f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {agreement.min():>9.5f} {agreement.mean():>9.5f}")
+
+    if not within_tolerance:
+        print("\n❌ At least one backend exceeded its documented cosine tolerance")
+        return 1
+    print("\n✅ All backends within documented cosine tolerance")
+    return 0
+
+
+def benchmark_models(args) -> int:
+    """Compare candidate models on ranking quality against speed"""
+    internship_skills, internship_texts = sample_internships(args.num_texts)
+    student_skills, student_texts = sample_students(args.num_students)
+
+    # Graded relevance: number of skills a student shares with each internship
+    internship_sets = [{skill.lower() for skill in skills} for skills in internship_skills]
+    relevance = np.array([
+        [len(internship_set & {skill.lower() for skill in skills}) for internship_set in internship_sets]
+        for skills in student_skills
+    ], dtype=np.float64)
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for model_name in args.models:
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(run_model, (
+                model_name, args.backend, internship_texts, student_texts, args.batch_size, args.k
+            )))
+
+    reference = results[0]["top_k"]
+    print(f"\nInternships: {len(internship_texts)}  students: {len(student_texts)}  "
+          f"backend: {args.backend}  reference: {results[0]['model']}\n")
+    print(f"{'model':<28} {'dim':>5} {'load s':>7} {'RSS MB':>8} {'texts/s':>9} {'p50 ms':>8} "
+          f"{'NDCG@' + str(args.k):>9} {'recall@' + str(args.k):>10}")
+
+    for result in results:
+        ndcg = np.mean([ndcg_at_k(ranking, relevance[i]) for i, ranking in enumerate(result["top_k"])])
+        recall = np.mean([len(set(ranking) & set(reference[i])) / args.k
+                          for i, ranking in enumerate(result["top_k"])])
+        print(f"{result['model']:<28} {result['dimension']:>5} {result['load_s']:>7.2f} {result['rss_mb']:>8.0f} "
+              f"{result['throughput']:>9.0f} {result['p50_ms']:>8.2f} {ndcg:>9.4f} {recall:>10.4f}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends and models")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backends_parser = subparsers.add_parser("backends", help="compare inference backends for one model")
+    backends_parser.add_argument("--model", default=DEFAULT_MODEL)
+    backends_parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    backends_parser.add_argument("--num-texts", type=int, default=2000)
+    backends_parser.add_argument("--batch-size", type=int, default=64)
+    backends_parser.add_argument("--num-queries", type=int, default=200)
+    backends_parser.add_argument("--num-reference", type=int, default=500)
+
+    models_parser = subparsers.add_parser("models", help="compare ranking quality against speed across models")
+    models_parser.add_argument("--models", nargs="+", default=CANDIDATE_MODELS,
+                               help="candidate models; the first one is the reference ranking")
+    models_parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    models_parser.add_argument("--num-texts", type=int, default=2000)
+    models_parser.add_argument("--num-students", type=int, default=200)
+    models_parser.add_argument("--batch-size", type=int, default=64)
+    models_parser.add_argument("-k", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command == "backends":
+        return benchmark_backends(args)
+    return benchmark_models(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
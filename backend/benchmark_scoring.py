@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Scoring Benchmarks
+==================
+
+Microbenchmarks for the non-embedding stages of the ranking pipeline, run on
+synthetic students and internships (no model is loaded).
+
+``policy``: per-pair cost of ``PolicyAwareScoring.calculate_policy_score``
+when the student profile is re-parsed for every internship (a
+``StudentProfile`` is passed) against reusing a compiled ``StudentContext``,
+plus the vectorized ``calculate_policy_scores`` over an ``InternshipTable``.
+
+``topk``: cost of the final ranking stage for N candidates. Building a
+``Recommendation`` for every candidate and sorting the list is compared with
+a full ``argsort`` of the score array and with ``top_k_indices``
+(argpartition); the latter two only build recommendations for the k winners.
+Reports latency and peak Python allocations (tracemalloc).
+
+Usage:
+    python benchmark_scoring.py policy --num-internships 5000 --repeat 5
+    python benchmark_scoring.py topk --sizes 10000 100000 -k 10
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from internship_table import InternshipTable
+from matchmaking_system import AdvancedMatchmakingSystem, Internship, PolicyAwareScoring, StudentProfile
+from vector_index import top_k_indices
+
+STATES = {
+    "Maharashtra": {"Pune": ["Pune", "Hinjewadi"], "Mumbai": ["Mumbai", "Thane"]},
+    "Karnataka": {"Bangalore Urban": ["Bangalore"], "Mysore": ["Mysore"]},
+    "Delhi": {"New Delhi": ["New Delhi"], "South Delhi": ["Saket"]},
+    "Tamil Nadu": {"Chennai": ["Chennai"], "Coimbatore": ["Coimbatore"]},
+}
+
+CATEGORIES = [
+    "General", "Scheduled Caste (SC)", "Scheduled Tribe (ST)", "Other Backward Classes (OBC)",
+    "Economically Weaker Section (EWS)", "Person with Disability (PwD)", "Minority",
+]
+
+INCOMES = ["₹1,00,000 - ₹2,00,000", "₹2,00,000 - ₹5,00,000", "₹5,00,000 - ₹10,00,000", "1500000", "", "not sure"]
+STIPENDS = ["₹5,000 - ₹10,000", "₹10,000 - ₹20,000", "15000", "", "negotiable"]
+DURATIONS = ["2 months", "3 months", "6 months", "8 weeks", "12 weeks", "", "flexible"]
+
+
+def _random_place(rng: random.Random):
+    """Random (state, district, city)"""
+    state = rng.choice(list(STATES))
+    district = rng.choice(list(STATES[state]))
+    return state, district, rng.choice(STATES[state][district])
+
+
+def sample_students(num_students: int, seed: int = 7) -> List[StudentProfile]:
+    """Deterministic students, including some with unparseable fields"""
+    rng = random.Random(seed)
+    students = []
+    for i in range(num_students):
+        state, district, city = _random_place(rng)
+        students.append(StudentProfile(
+            id=f"student-{i}", full_name=f"Student {i}", email=f"student{i}@example.com", phone="",
+            date_of_birth="2002-01-01", state=state, district=district, city=city, pincode="",
+            current_education="Bachelor's Degree", university="", course="", graduation_year="2025",
+            cgpa=rng.choice(["6.5", "7.2", "8.0", "8.8", "9.4", ""]),
+            social_category=rng.choice(CATEGORIES), family_income=rng.choice(INCOMES),
+            participation_type=rng.choice(["first-time", "returning"]), skills=["Python", "SQL"],
+            preferred_locations=[_random_place(rng)[2] for _ in range(rng.randint(0, 3))],
+            stipend_expectation=rng.choice(STIPENDS), available_duration=rng.choice(DURATIONS),
+            additional_info=""
+        ))
+    return students
+
+
+def sample_internships(num_internships: int, seed: int = 42) -> List[Internship]:
+    """Deterministic internships spread over the sample locations"""
+    rng = random.Random(seed)
+    internships = []
+    for i in range(num_internships):
+        state, district, city = _random_place(rng)
+        internships.append(Internship(
+            id=f"internship-{i}", title=f"Intern {i}", company=f"Company {i % 97}", description="",
+            skills_required=["Python"], cgpa_requirement=rng.choice([None, 6.0, 7.0, 7.5, 8.0, 8.5]),
+            location=f"{city}, {state}", state=state, district=district, city=city,
+            internship_type=rng.choice(["remote", "hybrid", "on-site"]),
+            duration_weeks=rng.choice([0, 8, 12, 16, 24]),
+            stipend_amount=rng.choice([None, 5000, 8000, 10000, 15000, 25000]), stipend_currency="INR",
+            application_deadline="2030-01-01", start_date="2030-02-01", end_date="2030-05-01",
+            available_positions=rng.randint(1, 5), filled_positions=0, benefits=[], application_process="",
+            is_active=True, tags=[], department="", category="tech", company_size="startup"
+        ))
+    return internships
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    """Fastest wall-clock time of ``repeat`` runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(fn: Callable[[], object]) -> Tuple[float, float]:
+    """(seconds, peak traced allocation in MB) of one run"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / (1024 * 1024)
+
+
+def benchmark_policy(args) -> int:
+    """Per-pair policy scoring cost with and without a compiled student context"""
+    policy = PolicyAwareScoring()
+    students = sample_students(args.num_students)
+    internships = sample_internships(args.num_internships)
+    table = InternshipTable(internships)
+    contexts = [policy.compile_student(student) for student in students]
+    pairs = len(students) * len(internships)
+
+    def per_pair_profile():
+        for student in students:
+            for internship in internships:
+                policy.calculate_policy_score(student, internship)
+
+    def per_pair_context():
+        for student in students:
+            context = policy.compile_student(student)
+            for internship in internships:
+                policy.calculate_policy_score(context, internship)
+
+    def vectorized():
+        for context in contexts:
+            policy.calculate_policy_scores(context, table)
+
+    results = [
+        ("per-pair, re-parse profile", best_of(args.repeat, per_pair_profile)),
+        ("per-pair, compiled context", best_of(args.repeat, per_pair_context)),
+        ("vectorized table", best_of(args.repeat, vectorized)),
+    ]
+
+    print(f"\nStudents: {len(students)}  internships: {len(internships)}  pairs: {pairs}  "
+          f"best of {args.repeat}\n")
+    print(f"{'method':<28} {'total ms':>10} {'us/pair':>9} {'speedup':>8}")
+    baseline = results[0][1]
+    for name, seconds in results:
+        print(f"{name:<28} {seconds * 1000:>10.1f} {seconds / pairs * 1e6:>9.2f} {baseline / seconds:>7.1f}x")
+    return 0
+
+
+def benchmark_topk(args) -> int:
+    """Final ranking stage: rank every candidate against selecting the top-k first"""
+    system = AdvancedMatchmakingSystem()
+    student = sample_students(1)[0]
+    context = system.policy_scorer.compile_student(student)
+    rng = np.random.default_rng(0)
+
+    print(f"\nk: {args.k}  times are the best of {args.repeat}; memory is peak traced allocation\n")
+    print(f"{'N':>8} {'method':<28} {'ms':>10} {'peak MB':>9}")
+    for size in args.sizes:
+        internships = sample_internships(size)
+        sbert, policy, linucb = rng.random(size), rng.random(size), rng.random(size)
+        final = 0.4 * sbert + 0.4 * policy + 0.2 * linucb
+
+        def build(i: int, rank: int = 0):
+            return system._build_recommendation(
+                student, internships[i], float(sbert[i]), float(policy[i]), float(linucb[i]), 0.1,
+                float(final[i]), [], rank=rank, student_context=context
+            )
+
+        def rank_everything():
+            recommendations = [build(i) for i in range(size)]
+            recommendations.sort(key=lambda rec: rec.match_score, reverse=True)
+            return recommendations[:args.k]
+
+        def full_argsort():
+            return [build(i, rank) for rank, i in enumerate(np.argsort(-final, kind="stable")[:args.k], 1)]
+
+        def partial_select():
+            return [build(i, rank) for rank, i in enumerate(top_k_indices(final, args.k), 1)]
+
+        methods = [("build all + sort", rank_everything), ("argsort + build k", full_argsort),
+                   ("argpartition + build k", partial_select)]
+        expected = [rec.internship.id for rec in partial_select()]
+        for name, fn in methods:
+            assert [rec.internship.id for rec in fn()] == expected, name
+            seconds = best_of(args.repeat, fn)
+            _, peak_mb = measure(fn)
+            print(f"{size:>8} {name:<28} {seconds * 1000:>10.2f} {peak_mb:>9.2f}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring stages of the matchmaking pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    policy_parser = subparsers.add_parser("policy", help="policy scoring with and without a compiled student")
+    policy_parser.add_argument("--num-students", type=int, default=20)
+    policy_parser.add_argument("--num-internships", type=int, default=2000)
+    policy_parser.add_argument("--repeat", type=int, default=3)
+
+    topk_parser = subparsers.add_parser("topk", help="final top-k selection and recommendation building")
+    topk_parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    topk_parser.add_argument("-k", type=int, default=10)
+    topk_parser.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "topk":
+        return benchmark_topk(args)
+    return benchmark_policy(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
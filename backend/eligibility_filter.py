@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Eligibility Pre-Filter
+======================
+
+Hard constraints applied to the candidate internships before any model work
+(SBERT retrieval, policy scoring, LinUCB). Each predicate is a cheap
+vectorized check over the whole candidate list that returns a boolean "keep"
+mask:
+
+- ``active``: the posting is active
+- ``deadline``: the application deadline has not passed
+- ``positions``: not every available position is filled
+- ``cgpa``: the student's CGPA is not more than ``cgpa_margin`` below the requirement
+
+Predicates run in order and every request reports how many candidates each
+one removed. The enabled predicates are configurable per instance or with
+``MATCHMAKING_PREFILTERS`` (comma-separated names, default all).
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from internship_table import _truthy_float
+
+DEFAULT_PREDICATES = tuple(
+    name.strip() for name in os.environ.get("MATCHMAKING_PREFILTERS", "active,deadline,positions,cgpa").split(",")
+    if name.strip()
+)
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+@dataclass
+class FilterReport:
+    """Outcome of one pre-filter pass"""
+    keep: np.ndarray  # Mask over the input internships
+    removed: Dict[str, int]  # Candidates removed by each predicate, in order
+
+    @property
+    def total(self) -> int:
+        return len(self.keep)
+
+    @property
+    def remaining(self) -> int:
+        return int(np.count_nonzero(self.keep))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"total": self.total, "remaining": self.remaining, "removed": dict(self.removed)}
+
+
+class EligibilityFilter:
+    """Configurable hard-constraint pre-filter with per-predicate counters"""
+
+    def __init__(self, predicates: Optional[Iterable[str]] = None, cgpa_margin: float = 1.0,
+                 today: Optional[Callable[[], date]] = None):
+        """``predicates`` selects and orders the built-in predicates (default DEFAULT_PREDICATES)"""
+        self.cgpa_margin = cgpa_margin
+        self._today = today or date.today
+        self._builtin = {
+            "active": self._active,
+            "deadline": self._deadline,
+            "positions": self._positions,
+            "cgpa": self._cgpa,
+        }
+        self.predicates: Dict[str, Callable[[Any, List[Any]], np.ndarray]] = {}
+        for name in (DEFAULT_PREDICATES if predicates is None else predicates):
+            if name not in self._builtin:
+                raise ValueError(f"Unknown eligibility predicate '{name}', expected one of {list(self._builtin)}")
+            self.predicates[name] = self._builtin[name]
+
+        self._totals = {name: 0 for name in self.predicates}
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def register_predicate(self, name: str, predicate: Callable[[Any, List[Any]], np.ndarray]):
+        """Add (or replace) a predicate ``predicate(student_context, internships) -> keep mask``"""
+        self.predicates[name] = predicate
+        with self._lock:
+            self._totals.setdefault(name, 0)
+
+    def apply(self, student_context, internships: List[Any]) -> FilterReport:
+        """Evaluate every predicate and attribute each removal to the first predicate that rejects it"""
+        keep = np.ones(len(internships), dtype=bool)
+        removed = {}
+        for name, predicate in self.predicates.items():
+            passes = np.asarray(predicate(student_context, internships), dtype=bool)
+            removed[name] = int(np.count_nonzero(keep & ~passes))
+            keep &= passes
+
+        with self._lock:
+            self._requests += 1
+            for name, count in removed.items():
+                self._totals[name] = self._totals.get(name, 0) + count
+        return FilterReport(keep, removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative removals per predicate since startup"""
+        with self._lock:
+            return {"requests": self._requests, "removed": dict(self._totals)}
+
+    # Built-in predicates
+
+    @staticmethod
+    def _active(student_context, internships: List[Any]) -> np.ndarray:
+        return np.fromiter((bool(i.is_active) for i in internships), dtype=bool, count=len(internships))
+
+    def _deadline(self, student_context, internships: List[Any]) -> np.ndarray:
+        """Deadlines are ISO dates (optionally with a time); missing or unparseable ones are kept"""
+        deadlines = np.array([
+            i.application_deadline[:10] if i.application_deadline and _ISO_DATE.match(i.application_deadline) else ""
+            for i in internships
+        ], dtype="U10")
+        return (deadlines == "") | (deadlines >= self._today().isoformat())
+
+    @staticmethod
+    def _positions(student_context, internships: List[Any]) -> np.ndarray:
+        available = np.fromiter((i.available_positions or 0 for i in internships), dtype=np.float64,
+                                count=len(internships))
+        filled = np.fromiter((i.filled_positions or 0 for i in internships), dtype=np.float64,
+                             count=len(internships))
+        return filled < available
+
+    def _cgpa(self, student_context, internships: List[Any]) -> np.ndarray:
+        """Unknown CGPAs (student or requirement) are kept"""
+        if student_context.cgpa is None:
+            return np.ones(len(internships), dtype=bool)
+        required = np.array([_truthy_float(i.cgpa_requirement) for i in internships], dtype=np.float64)
+        return ~(student_context.cgpa < required - self.cgpa_margin)
+
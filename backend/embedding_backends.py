@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Embedding Inference Backends
+============================
+
+Pluggable CPU inference backends for sentence embeddings:
+
+- ``torch``: the reference sentence-transformers (PyTorch fp32) model.
+- ``onnx``: the same transformer exported to ONNX and run with ONNX Runtime.
+- ``onnx-int8``: the ONNX model with int8 dynamic quantization of its weights.
+
+The model is chosen with ``MATCHMAKING_EMBEDDING_MODEL`` (default
+``all-MiniLM-L6-v2``) and the backend with ``MATCHMAKING_EMBEDDING_BACKEND``
+(default ``torch``), or by passing ``model_name=``/``backend=`` to
+``SBERTEmbeddingService``. ONNX models are
+exported on first use into ``MATCHMAKING_ONNX_DIR`` (default ``onnx_models/``),
+which requires torch once; afterwards only onnxruntime and the tokenizer are
+needed.
+
+Accuracy contract, measured as cosine similarity between the PyTorch embedding
+and the backend embedding of the same text (see ``benchmark_embeddings.py``):
+- ``onnx``: >= 1 - ONNX_FP32_COSINE_TOLERANCE (0.9999)
+- ``onnx-int8``: >= 1 - ONNX_INT8_COSINE_TOLERANCE (0.98)
+"""
+
+import json
+import logging
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.environ.get("MATCHMAKING_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+DEFAULT_BACKEND = os.environ.get("MATCHMAKING_EMBEDDING_BACKEND", "torch")
+DEFAULT_ONNX_DIR = os.environ.get("MATCHMAKING_ONNX_DIR", "onnx_models")
+
+# Maximum allowed (1 - cosine) between the PyTorch and ONNX embeddings of a text
+ONNX_FP32_COSINE_TOLERANCE = 1e-4
+ONNX_INT8_COSINE_TOLERANCE = 2e-2
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def embedding_backend_name(model_name: str, backend: str) -> str:
+    """Identifier for the vectors a backend produces, used to key persisted embeddings"""
+    if backend in ("torch", "sentence-transformers"):
+        return model_name
+    return f"{model_name}-{backend}"
+
+
+class SentenceTransformerBackend:
+    """Reference PyTorch backend using sentence-transformers"""
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.name = embedding_backend_name(model_name, "torch")
+        self.model = SentenceTransformer(model_name, device=device)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 matrix"""
+        return np.asarray(self.model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def memory_bytes(self) -> int:
+        """Size of the model weights in memory"""
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+
+def onnx_model_dir(model_name: str, base_dir: str = DEFAULT_ONNX_DIR) -> str:
+    """Directory holding the exported ONNX files for a model"""
+    return os.path.join(base_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True,
+                      opset_version: int = 14) -> str:
+    """Export a sentence-transformers model to ONNX (plus an int8 copy)
+
+    Writes ``model.onnx``, optionally ``model_int8.onnx``, the tokenizer files
+    and ``pooling.json`` describing how token embeddings are pooled.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, "model.onnx")
+    logger.info(f"Exporting {model_name} to ONNX: {model_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version,
+        )
+    tokenizer.save_pretrained(output_dir)
+
+    pooling = st_model[1]
+    with open(os.path.join(output_dir, "pooling.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "mode": pooling.get_pooling_mode_str(),
+            "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+            "max_seq_length": st_model.max_seq_length,
+        }, f)
+
+    if quantize:
+        quantize_onnx_model(model_path, os.path.join(output_dir, "model_int8.onnx"))
+    return model_path
+
+
+def quantize_onnx_model(model_path: str, output_path: str) -> str:
+    """Apply int8 dynamic quantization to an exported ONNX model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info(f"Quantizing {model_path} to int8: {output_path}")
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
+
+
+class ONNXBackend:
+    """ONNX Runtime backend, optionally int8-quantized"""
+
+    def __init__(self, model_name: str, quantized: bool = False, model_dir: Optional[str] = None,
+                 num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.name = embedding_backend_name(model_name, "onnx-int8" if quantized else "onnx")
+        self.model_dir = model_dir or onnx_model_dir(model_name)
+
+        filename = "model_int8.onnx" if quantized else "model.onnx"
+        model_path = os.path.join(self.model_dir, filename)
+        self.model_path = model_path
+        if not os.path.exists(os.path.join(self.model_dir, "model.onnx")):
+            export_onnx_model(model_name, self.model_dir, quantize=quantized)
+        if quantized and not os.path.exists(model_path):
+            quantize_onnx_model(os.path.join(self.model_dir, "model.onnx"), model_path)
+
+        with open(os.path.join(self.model_dir, "pooling.json"), "r", encoding="utf-8") as f:
+            self.pooling = json.load(f)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        self._dimension = int(self.session.get_outputs()[0].shape[-1])
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """Pool token embeddings the same way the sentence-transformers model does"""
+        if self.pooling.get("mode") == "cls":
+            return token_embeddings[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        if self.pooling.get("mode") == "max":
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 matrix"""
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.pooling.get("max_seq_length", 256),
+                return_tensors="np",
+            )
+            feed = {name: batch[name].astype(np.int64) for name in self.input_names if name in batch}
+            token_embeddings = self.session.run(None, feed)[0]
+            embeddings = self._pool(token_embeddings, batch["attention_mask"])
+            if self.pooling.get("normalize"):
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                embeddings = embeddings / np.clip(norms, 1e-12, None)
+            outputs.append(embeddings.astype(np.float32))
+
+        if not outputs:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        return np.vstack(outputs)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dimension
+
+    def memory_bytes(self) -> int:
+        """Size of the model weights (the serialized graph)"""
+        return os.path.getsize(self.model_path)
+
+
+def create_embedding_backend(model_name: str, backend: str = DEFAULT_BACKEND):
+    """Create the inference backend selected by name"""
+    if backend in ("torch", "sentence-transformers"):
+        return SentenceTransformerBackend(model_name)
+    if backend == "onnx":
+        return ONNXBackend(model_name, quantized=False)
+    if backend == "onnx-int8":
+        return ONNXBackend(model_name, quantized=True)
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Process-Wide Embedding Provider
+===============================
+
+Loads each embedding model (per inference backend) once per process and hands
+the same instance to every consumer: the matchmaking engine and the RAG
+retriever both embed with ``DEFAULT_MODEL``, so sharing it halves model
+memory and load time.
+
+Load time and memory of every loaded model are recorded and exposed through
+``embedding_provider_stats()`` for the health endpoints.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from embedding_backends import DEFAULT_BACKEND, DEFAULT_MODEL, create_embedding_backend
+
+logger = logging.getLogger(__name__)
+
+# LangChain is optional; the adapter only subclasses its interface when installed
+try:
+    from langchain_core.embeddings import Embeddings as _LangChainEmbeddings
+except ImportError:
+    _LangChainEmbeddings = object
+
+_backends: Dict[tuple, Any] = {}
+_stats: Dict[tuple, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _current_rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable, 0 without either)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        # Unix only; Windows has neither /proc nor the resource module
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def get_embedding_backend(model_name: str, backend: str = DEFAULT_BACKEND, consumer: str = "default"):
+    """Return the shared backend for (model, backend), loading it on first request"""
+    key = (model_name, backend)
+    with _lock:
+        if key not in _backends:
+            rss_before = _current_rss_mb()
+            start = time.perf_counter()
+            _backends[key] = create_embedding_backend(model_name, backend)
+            load_seconds = time.perf_counter() - start
+
+            _stats[key] = {
+                "model_name": model_name,
+                "backend": backend,
+                "load_seconds": round(load_seconds, 3),
+                "rss_delta_mb": round(_current_rss_mb() - rss_before, 1),
+                "model_size_mb": round(_backends[key].memory_bytes() / (1024 * 1024), 1),
+                "loaded_at": datetime.now().isoformat(),
+                "consumers": [],
+            }
+            logger.info(f"Loaded shared embedding model {model_name} ({backend}) in {load_seconds:.2f}s")
+
+        if consumer not in _stats[key]["consumers"]:
+            _stats[key]["consumers"].append(consumer)
+        return _backends[key]
+
+
+def embedding_provider_stats() -> List[Dict[str, Any]]:
+    """Load time, memory and consumers of every model loaded in this process"""
+    with _lock:
+        return [dict(stats, consumers=list(stats["consumers"])) for stats in _stats.values()]
+
+
+class SharedEmbeddings(_LangChainEmbeddings):
+    """LangChain ``Embeddings`` adapter over the shared embedding backend"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, backend: str = DEFAULT_BACKEND,
+                 consumer: str = "rag", batch_size: int = 64):
+        self.model_name = model_name
+        self.backend = backend
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self._model: Optional[Any] = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_embedding_backend(self.model_name, self.backend, consumer=self.consumer)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents"""
+        return self.model.encode(list(texts), batch_size=self.batch_size).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self.model.encode([text], batch_size=1)[0].tolist()
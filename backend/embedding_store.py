@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Persistent Embedding Store
+==========================
+
+Stores internship embeddings on disk so postings are only ever embedded once.
+
+Embeddings live in a flat float32 file that is memory-mapped for reads, and a
+small JSON index maps each internship id to its row together with a hash of
+the exact text that was fed to the model. An edited posting hashes differently
+and is re-embedded automatically; unchanged postings are served straight from
+the memory map without touching the model.
+
+The data file is append-only. Superseded rows are reclaimed by ``compact()``,
+which runs automatically once more than half of the file is garbage.
+
+Several processes (uvicorn workers, benchmark children) can share a store:
+writes hold an exclusive lock on a ``.lock`` file next to the data and first
+reload the index if another process changed it, and readers reload a changed
+index before use. The directory is only created on the first write.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Inter-process file locking: fcntl on POSIX, msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.environ.get("MATCHMAKING_EMBEDDING_DIR", "embedding_store")
+
+
+def text_hash(text: str) -> str:
+    """Stable hash of the exact text that is embedded"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Memory-mapped embedding store keyed by (internship id, text hash)"""
+
+    def __init__(self, directory: str = DEFAULT_STORE_DIR, model_name: str = "all-MiniLM-L6-v2"):
+        """Open (or create) the store for a given model"""
+        self.directory = directory
+        self.model_name = model_name
+
+        # One file pair per model so vectors of different models never mix
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.data_path = os.path.join(directory, f"{safe_name}.f32")
+        self.index_path = os.path.join(directory, f"{safe_name}.json")
+        self.lock_path = os.path.join(directory, f"{safe_name}.lock")
+
+        self.dimension: Optional[int] = None
+        self.rows = 0
+        self.index: Dict[str, Tuple[int, str]] = {}  # internship_id -> (row, text hash)
+        self._matrix: Optional[np.ndarray] = None
+        self._index_stamp = None  # stat of the index file last read or written
+        self._lock = threading.Lock()
+        self._load()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared by every process using this store (creates the directory)"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _stat_index(self):
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        """Load the index and map the data file"""
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with self._file_lock():
+                self._read_index()
+            logger.info(f"Loaded embedding store with {len(self.index)} internships from {self.directory}")
+        except Exception as e:
+            logger.error(f"Failed to load embedding store, starting empty: {e}")
+            self.dimension = None
+            self.rows = 0
+            self.index = {}
+            self._matrix = None
+
+    def _read_index(self):
+        """Read the index from disk and drop any torn data tail (caller holds the file lock)"""
+        self._index_stamp = self._stat_index()
+        if self._index_stamp is None:
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dimension = meta["dimension"]
+        self.rows = meta["rows"]
+        self.index = {key: (row, digest) for key, (row, digest) in meta["index"].items()}
+        self._truncate_tail()
+        self._remap()
+
+    def _truncate_tail(self):
+        """Drop a partially written tail left behind by a crash mid-append (caller holds the file lock)"""
+        expected_size = self.rows * (self.dimension or 0) * 4
+        if os.path.exists(self.data_path) and os.path.getsize(self.data_path) > expected_size:
+            with open(self.data_path, "r+b") as f:
+                f.truncate(expected_size)
+
+    def _refresh(self):
+        """Reload the index if another process changed it (caller holds _lock)"""
+        if self._stat_index() == self._index_stamp:
+            return
+        try:
+            with self._file_lock():
+                self._read_index()
+        except Exception as e:
+            logger.error(f"Failed to reload embedding store index: {e}")
+
+    def _remap(self):
+        """Refresh the memory map after the data file has grown"""
+        if self.rows and self.dimension:
+            self._matrix = np.memmap(self.data_path, dtype=np.float32, mode="r",
+                                     shape=(self.rows, self.dimension))
+        else:
+            self._matrix = None
+
+    def _write_index(self):
+        """Atomically persist the index"""
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "model_name": self.model_name,
+                "dimension": self.dimension,
+                "rows": self.rows,
+                "index": {key: [row, digest] for key, (row, digest) in self.index.items()},
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_stamp = self._stat_index()
+
+    def lookup(self, internship_id: str, text: str) -> Optional[np.ndarray]:
+        """Return the stored embedding if the text is unchanged"""
+        with self._lock:
+            self._refresh()
+            entry = self.index.get(internship_id)
+            if entry is None or entry[1] != text_hash(text) or self._matrix is None:
+                return None
+            return np.array(self._matrix[entry[0]])
+
+    def put_many(self, internship_ids: List[str], texts: List[str], embeddings: np.ndarray):
+        """Append embeddings and point the index at the new rows"""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if len(internship_ids) == 0:
+            return
+
+        with self._lock, self._file_lock():
+            # Append after rows other processes added since this one last looked
+            if self._stat_index() != self._index_stamp:
+                self._read_index()
+            else:
+                self._truncate_tail()
+            if self.dimension is None:
+                self.dimension = int(embeddings.shape[1])
+            elif embeddings.shape[1] != self.dimension:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match "
+                                 f"store dimension {self.dimension}")
+
+            with open(self.data_path, "ab") as f:
+                f.write(embeddings.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            for offset, (internship_id, text) in enumerate(zip(internship_ids, texts)):
+                self.index[internship_id] = (self.rows + offset, text_hash(text))
+            self.rows += len(internship_ids)
+
+            self._write_index()
+            self._remap()
+
+            if self.rows > 2 * len(self.index):
+                self._compact_locked()
+
+    def get_or_encode(self, internship_ids: List[str], texts: List[str],
+                      encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Return embeddings for all internships, encoding only new or edited ones"""
+        hashes = [text_hash(text) for text in texts]
+        missing = {}
+        with self._lock:
+            self._refresh()
+            for i, (internship_id, digest) in enumerate(zip(internship_ids, hashes)):
+                entry = self.index.get(internship_id)
+                if entry is None or entry[1] != digest:
+                    # Duplicate ids in one call are embedded once, last text wins
+                    missing[internship_id] = i
+
+        if missing:
+            positions = list(missing.values())
+            new_embeddings = encode_fn([texts[i] for i in positions])
+            self.put_many([internship_ids[i] for i in positions],
+                          [texts[i] for i in positions], new_embeddings)
+            logger.info(f"Embedded {len(positions)} new or edited internships")
+
+        with self._lock:
+            if len(internship_ids) == 0 or self._matrix is None:
+                return np.zeros((0, self.dimension or 0), dtype=np.float32)
+            rows = np.fromiter((self.index[internship_id][0] for internship_id in internship_ids),
+                               dtype=np.int64, count=len(internship_ids))
+            return np.asarray(self._matrix[rows])
+
+    def fingerprint(self, internship_ids: List[str]) -> str:
+        """Digest of the ids and their stored text hashes, to detect catalogue changes"""
+        digest = hashlib.sha1()
+        with self._lock:
+            self._refresh()
+            for internship_id in internship_ids:
+                entry = self.index.get(internship_id)
+                digest.update(f"{internship_id}\0{entry[1] if entry else ''}\0".encode("utf-8"))
+        return digest.hexdigest()
+
+    def compact(self):
+        """Rewrite the data file without superseded rows"""
+        with self._lock, self._file_lock():
+            if self._stat_index() != self._index_stamp:
+                self._read_index()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Compact (caller holds _lock and the file lock)"""
+        if self._matrix is None:
+            return
+
+        ids = list(self.index.keys())
+        old_rows = np.array([self.index[key][0] for key in ids], dtype=np.int64)
+        live = np.ascontiguousarray(self._matrix[old_rows])
+
+        tmp_path = self.data_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(live.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._matrix = None
+        os.replace(tmp_path, self.data_path)
+        self.index = {key: (new_row, self.index[key][1]) for new_row, key in enumerate(ids)}
+        self.rows = len(ids)
+        self._write_index()
+        self._remap()
+        logger.info(f"Compacted embedding store to {self.rows} rows")
+
+    def __len__(self) -> int:
+        return len(self.index)
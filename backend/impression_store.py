@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Impression Store
+================
+
+Remembers the LinUCB context vector of every served recommendation under a
+short impression id. Feedback that quotes the id can update the bandit with
+the exact vector the recommendation was scored with, instead of re-running
+SBERT and policy scoring (which may also have changed in the meantime).
+
+The store is bounded: least recently served impressions are evicted first
+and entries expire after ``ttl`` seconds; feedback on an evicted impression
+falls back to recomputing the vector.
+"""
+
+import secrets
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from caching import LRUCache
+
+
+@dataclass(frozen=True)
+class Impression:
+    """One served (student, internship) recommendation"""
+    student_id: str
+    internship_id: str
+    context_vector: np.ndarray  # float32, read-only
+
+
+class ImpressionStore:
+    """Bounded in-memory map from impression id to served context vector"""
+
+    def __init__(self, maxsize: int = 50000, ttl: Optional[float] = 7 * 24 * 3600):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def new_id() -> str:
+        """Random URL-safe impression id (12 characters)"""
+        return secrets.token_urlsafe(9)
+
+    def record(self, student_id: str, internship_ids: List[str], context_vectors: np.ndarray) -> List[str]:
+        """Store one impression per row of ``context_vectors``; returns their ids"""
+        # Own compact copy, so the caller's (possibly much larger) matrix is not kept alive
+        vectors = np.array(context_vectors, dtype=np.float32, copy=True)
+        vectors.flags.writeable = False
+        impression_ids = []
+        for internship_id, vector in zip(internship_ids, vectors):
+            impression_id = self.new_id()
+            self._cache.put(impression_id, Impression(student_id, internship_id, vector))
+            impression_ids.append(impression_id)
+        return impression_ids
+
+    def get(self, impression_id: str) -> Optional[Impression]:
+        """The impression, or None if unknown, evicted or expired"""
+        return self._cache.get(impression_id)
+
+    def stats(self):
+        return self._cache.cache_info()._asdict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Interaction Log
+===============
+
+Append-only log of LinUCB feedback in the ``interactions`` table.
+
+Writes use group commit: ``append`` hands the row to a single writer thread
+and waits until it is durable, while the writer commits everything queued
+since its previous commit in one transaction. Concurrent feedback therefore
+shares one fsync instead of paying one each. Context vectors are stored as
+binary float32 BLOBs (bandit_store.encode_array) instead of JSON text; rows
+written as JSON by older versions stay readable and ``compact`` rewrites them.
+
+Rows are only ever inserted. ``iter_interactions`` streams the log in chunks
+of NumPy arrays and ``export`` writes it to ``.npz`` (or Parquet, with
+pyarrow) for offline replay and retraining:
+
+    python interaction_log.py export interactions.npz
+    python interaction_log.py compact
+"""
+
+import argparse
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from bandit_store import DEFAULT_DB_PATH, decode_array, decode_context_vector, encode_array
+from sqlite_pool import ConnectionPool
+
+# pyarrow is optional; only needed for Parquet export
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = pq = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_DTYPE = np.float32
+
+# (interaction id, internship id, context vector, reward) of a committed row
+CommittedInteraction = Tuple[int, str, np.ndarray, float]
+
+
+def create_interaction_table(cursor: sqlite3.Cursor):
+    """Create the interactions table (context_vector holds BLOBs, or JSON text in old rows)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT,
+            internship_id TEXT,
+            context_vector BLOB,
+            reward REAL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+class _Pending:
+    """One queued append, signalled once its batch is committed"""
+    __slots__ = ("row", "done", "interaction_id")
+
+    def __init__(self, row):
+        self.row = row
+        self.done = threading.Event()
+        self.interaction_id: Optional[int] = None
+
+
+class InteractionLog:
+    """Group-committing writer for the interactions table"""
+
+    def __init__(self, db_path: str, max_batch: int = 1024,
+                 on_commit: Optional[Callable[[List[CommittedInteraction]], None]] = None,
+                 pool: Optional[ConnectionPool] = None, append_timeout: Optional[float] = 30.0):
+        """``on_commit`` is called by the writer thread with every committed batch, in id order
+
+        ``append`` gives up waiting after ``append_timeout`` seconds (None waits forever).
+        """
+        self.db_path = db_path
+        self.pool = pool if pool is not None else ConnectionPool(db_path)
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self.append_timeout = append_timeout
+        self.commits = 0
+        self.appended = 0
+
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    def append(self, student_id: str, internship_id: str, context_vector: np.ndarray,
+               reward: float) -> Optional[int]:
+        """Append one interaction and wait until it is committed
+
+        Returns its id, or None if the log is closed, the commit failed or it
+        did not complete within ``append_timeout`` (the row may still be
+        committed and applied later in that case).
+        """
+        pending = _Pending((student_id, internship_id, np.asarray(context_vector, dtype=CONTEXT_DTYPE),
+                            float(reward)))
+        # Queued under the lock so nothing can land behind close()'s sentinel
+        with self._start_lock:
+            if self._closed:
+                logger.warning(f"Interaction log is closed, interaction for {internship_id} dropped")
+                return None
+            self._ensure_writer()
+            self._queue.put(pending)
+        if not pending.done.wait(self.append_timeout):
+            logger.error(f"Interaction for {internship_id} not committed within {self.append_timeout}s")
+            return None
+        return pending.interaction_id
+
+    def _ensure_writer(self):
+        """Start the writer thread, or restart it if it died (caller holds _start_lock)"""
+        if self._thread is None or not self._thread.is_alive():
+            if self._thread is not None:
+                logger.warning("Interaction log writer thread died, restarting it")
+            self._thread = threading.Thread(target=self._write_loop, name="interaction-log", daemon=True)
+            self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            # Everything that queued up during the previous commit goes into this one
+            batch = [first]
+            stop = False
+            try:
+                while len(batch) < self.max_batch:
+                    try:
+                        pending = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if pending is None:
+                        stop = True
+                        break
+                    batch.append(pending)
+
+                self._commit(self.pool.connection(), batch)
+            except Exception as e:
+                # Keep the writer alive; the callers of this batch get None
+                logger.error(f"Error writing {len(batch)} interactions: {e}")
+                for pending in batch:
+                    pending.done.set()
+            if stop:
+                return
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Pending]):
+        """Write one batch in a single transaction, then notify on_commit and the waiting callers"""
+        try:
+            with conn:
+                ids = [
+                    conn.execute(
+                        "INSERT INTO interactions (student_id, internship_id, context_vector, reward) "
+                        "VALUES (?, ?, ?, ?)",
+                        (student_id, internship_id, encode_array(vector, CONTEXT_DTYPE), reward)
+                    ).lastrowid
+                    for student_id, internship_id, vector, reward in (pending.row for pending in batch)
+                ]
+        except Exception as e:
+            logger.error(f"Error committing {len(batch)} interactions: {e}")
+            for pending in batch:
+                pending.done.set()
+            return
+
+        self.commits += 1
+        self.appended += len(batch)
+        if self.on_commit is not None:
+            try:
+                self.on_commit([(interaction_id, pending.row[1], pending.row[2], pending.row[3])
+                                for interaction_id, pending in zip(ids, batch)])
+            except Exception as e:
+                logger.error(f"Error applying committed interactions: {e}")
+        for interaction_id, pending in zip(ids, batch):
+            pending.interaction_id = interaction_id
+            pending.done.set()
+
+    def stats(self):
+        return {"appended": self.appended, "commits": self.commits,
+                "rows_per_commit": self.appended / self.commits if self.commits else 0.0}
+
+    def close(self):
+        """Commit everything queued and stop the writer thread; later appends are rejected"""
+        with self._start_lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+
+@dataclass
+class InteractionBatch:
+    """A chunk of the interaction log as columns"""
+    ids: np.ndarray  # int64
+    student_ids: np.ndarray  # object (str)
+    internship_ids: np.ndarray  # object (str)
+    rewards: np.ndarray  # float32
+    timestamps: np.ndarray  # object (str)
+    contexts: np.ndarray  # (N × context_dim) float32
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _decode_contexts(values: List) -> np.ndarray:
+    """(N × d) matrix of stored context vectors
+
+    Binary rows of one shape are decoded together: the BLOBs are joined and
+    viewed as a matrix, skipping each row's header, without per-row parsing.
+    """
+    if values and all(isinstance(value, bytes) for value in values):
+        first = decode_array(values[0])
+        row_bytes = len(values[0])
+        if first.ndim == 1 and first.dtype == np.dtype("<f4") and all(len(value) == row_bytes for value in values):
+            header = row_bytes - first.nbytes
+            raw = np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), row_bytes)
+            return np.ascontiguousarray(raw[:, header:]).view("<f4")
+    return np.array([decode_context_vector(value) for value in values], dtype=CONTEXT_DTYPE)
+
+
+def iter_interactions(db_path: str, chunk_size: int = 100000, since_id: int = 0) -> Iterator[InteractionBatch]:
+    """Stream interactions with id > ``since_id`` in id order, ``chunk_size`` rows at a time"""
+    conn = sqlite3.connect(db_path)
+    try:
+        last_id = since_id
+        while True:
+            rows = conn.execute(
+                "SELECT id, student_id, internship_id, reward, timestamp, context_vector FROM interactions "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, chunk_size)
+            ).fetchall()
+            if not rows:
+                return
+            ids, student_ids, internship_ids, rewards, timestamps, contexts = zip(*rows)
+            last_id = ids[-1]
+            yield InteractionBatch(
+                ids=np.array(ids, dtype=np.int64),
+                student_ids=np.array(student_ids, dtype=object),
+                internship_ids=np.array(internship_ids, dtype=object),
+                rewards=np.array([reward or 0.0 for reward in rewards], dtype=np.float32),
+                timestamps=np.array(timestamps, dtype=object),
+                contexts=_decode_contexts(list(contexts)),
+            )
+    finally:
+        conn.close()
+
+
+def export(db_path: str, path: str, chunk_size: int = 100000, since_id: int = 0) -> int:
+    """Write the interaction log to ``.npz`` or ``.parquet``; returns the number of rows"""
+    chunks = iter_interactions(db_path, chunk_size, since_id)
+    if path.endswith(".parquet"):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is not installed: pip install pyarrow")
+        writer = None
+        total = 0
+        try:
+            for batch in chunks:
+                table = pa.table({
+                    "id": batch.ids,
+                    "student_id": pa.array(batch.student_ids.tolist(), type=pa.string()),
+                    "internship_id": pa.array(batch.internship_ids.tolist(), type=pa.string()),
+                    "reward": batch.rewards,
+                    "timestamp": pa.array(batch.timestamps.tolist(), type=pa.string()),
+                    "context": pa.FixedSizeListArray.from_arrays(batch.contexts.ravel(), batch.contexts.shape[1]),
+                })
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                total += len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        return total
+
+    batches = list(chunks)
+    if batches:
+        columns = {name: np.concatenate([getattr(batch, name) for batch in batches])
+                   for name in ("ids", "student_ids", "internship_ids", "rewards", "timestamps")}
+        contexts = np.concatenate([batch.contexts for batch in batches])
+    else:
+        columns = {"ids": np.zeros(0, dtype=np.int64), "rewards": np.zeros(0, dtype=np.float32)}
+        columns.update({name: np.zeros(0, dtype=str) for name in ("student_ids", "internship_ids", "timestamps")})
+        contexts = np.zeros((0, 0), dtype=CONTEXT_DTYPE)
+    # Strings as fixed-width unicode so the archive loads without pickle
+    np.savez(path, contexts=contexts, **{name: column.astype(str) if column.dtype == object else column
+                                         for name, column in columns.items()})
+    return len(contexts)
+
+
+def compact(db_path: str, chunk_size: int = 10000, vacuum: bool = True) -> int:
+    """Rewrite JSON-text context vectors as binary BLOBs and reclaim the space; returns rows rewritten"""
+    conn = sqlite3.connect(db_path)
+    rewritten = 0
+    try:
+        while True:
+            rows = conn.execute(
+                "SELECT id, context_vector FROM interactions WHERE typeof(context_vector) = 'text' LIMIT ?",
+                (chunk_size,)
+            ).fetchall()
+            if not rows:
+                break
+            with conn:
+                conn.executemany(
+                    "UPDATE interactions SET context_vector = ? WHERE id = ?",
+                    [(encode_array(np.array(json.loads(value), dtype=CONTEXT_DTYPE), CONTEXT_DTYPE), interaction_id)
+                     for interaction_id, value in rows]
+                )
+            rewritten += len(rows)
+        if vacuum and rewritten:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    logger.info(f"Compacted {rewritten} interactions to binary context vectors")
+    return rewritten
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain and export the LinUCB interaction log")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="learning database (default $MATCHMAKING_DB_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write interactions to .npz or .parquet")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--since-id", type=int, default=0)
+    export_parser.add_argument("--chunk-size", type=int, default=100000)
+
+    compact_parser = subparsers.add_parser("compact", help="convert JSON context vectors to binary")
+    compact_parser.add_argument("--no-vacuum", action="store_true")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        rows = export(args.db, args.path, args.chunk_size, args.since_id)
+        print(f"Exported {rows} interactions to {args.path}")
+    else:
+        rows = compact(args.db, vacuum=not args.no_vacuum)
+        print(f"Rewrote {rows} interactions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
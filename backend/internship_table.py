@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Columnar Internship Table
+=========================
+
+Column-oriented (NumPy) view of a list of internships. Every field the
+scoring stages need is parsed once when the table is built, so policy scores
+and bandit features can be computed for the whole candidate set with
+vectorized array operations instead of per-internship Python calls.
+"""
+
+from typing import Any, Iterable, List, Optional
+
+import numpy as np
+
+from location_index import LocationIndex
+
+
+def _truthy_float(value: Any) -> float:
+    """Numeric value of an optional field; NaN when missing or zero (treated as 'not specified')"""
+    if not value:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def parse_duration_weeks(value: Any) -> Optional[int]:
+    """Whole weeks of a duration field, as int(value); None when missing, zero or malformed"""
+    if not value:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class InternshipTable:
+    """Internship fields stored as one NumPy array per column"""
+
+    def __init__(self, internships: List[Any], locations: Optional[LocationIndex] = None):
+        """Build the table from ``Internship`` objects (row i is internships[i])
+        
+        Place names are interned through ``locations`` (a new LocationIndex
+        owned by this table by default) so they compare as integers.
+        """
+        self.internships = internships
+        self.size = len(internships)
+        self.ids = [internship.id for internship in internships]
+
+        # Numeric fields; NaN marks "not specified"
+        self.stipend = np.array([_truthy_float(i.stipend_amount) for i in internships], dtype=np.float64)
+        self.cgpa_requirement = np.array([_truthy_float(i.cgpa_requirement) for i in internships],
+                                         dtype=np.float64)
+        # Duration is compared in whole weeks, as int(duration_weeks)
+        weeks = [parse_duration_weeks(i.duration_weeks) for i in internships]
+        self.duration_weeks = np.array([np.nan if w is None else float(w) for w in weeks], dtype=np.float64)
+        self.has_stipend = ~np.isnan(self.stipend)
+        self.has_cgpa_requirement = ~np.isnan(self.cgpa_requirement)
+        self.has_duration = ~np.isnan(self.duration_weeks)
+
+        # Categorical fields
+        internship_type = np.array([i.internship_type for i in internships], dtype=object)
+        self.is_remote = internship_type == 'remote'
+        self.is_hybrid = internship_type == 'hybrid'
+        self.is_active = np.array([bool(i.is_active) for i in internships], dtype=bool)
+        self.num_skills = np.array([len(i.skills_required) for i in internships], dtype=np.float64)
+
+        # Location fields as interned ids
+        self.locations = locations if locations is not None else LocationIndex()
+        self.state_id = self.locations.ids(i.state for i in internships)
+        self.district_id = self.locations.ids(i.district for i in internships)
+        self.city_id = self.locations.ids(i.city for i in internships)
+        # Parts of the free-text location ("Pune, Maharashtra"), flattened with their row numbers
+        part_ids = [self.locations.part_ids(i.location) for i in internships]
+        self.location_part_ids = np.array([pid for ids in part_ids for pid in ids], dtype=np.int32)
+        self.location_part_rows = np.repeat(np.arange(self.size, dtype=np.int32),
+                                            [len(ids) for ids in part_ids])
+
+    def in_locations(self, location_ids: Iterable[int]) -> np.ndarray:
+        """Mask of rows whose state, district, city or a location part is one of ``location_ids``"""
+        ids = np.fromiter(location_ids, dtype=np.int32)
+        mask = np.isin(self.city_id, ids) | np.isin(self.district_id, ids) | np.isin(self.state_id, ids)
+        mask[self.location_part_rows[np.isin(self.location_part_ids, ids)]] = True
+        return mask
+
+    def take(self, positions: np.ndarray) -> List[Any]:
+        """Internship objects at the given row positions"""
+        return [self.internships[position] for position in positions]
+
+    def __len__(self) -> int:
+        return self.size
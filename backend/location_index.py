@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Location Index
+==============
+
+Interns normalized place names (state, district, city and the comma-separated
+parts of an internship's location string) into small integer ids, so that
+geographic scoring and "within my state" filtering are integer comparisons
+that vectorize over a whole InternshipTable.
+
+All ids share one vocabulary, which lets a student's preferred locations be
+compared against any of the state, district, city or location-part columns.
+
+Each InternshipTable owns its index, so the vocabulary only lives as long as
+the request that built it. Student-side names are looked up without being
+added: a name that no internship in the table uses cannot match anything.
+Blank names never match either; they intern to NO_LOCATION and look up as
+UNKNOWN_LOCATION, which differ from each other and from every real id.
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Id of a blank place name in a table
+NO_LOCATION = -1
+# Id looked up for a blank or unknown place name
+UNKNOWN_LOCATION = -2
+
+
+class LocationIndex:
+    """Thread-safe interning of normalized place names to integer ids"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Canonical form of a place name"""
+        return " ".join(name.lower().split()) if name else ""
+
+    def intern(self, name: str) -> int:
+        """Id of a place name, assigning a new one on first sight (NO_LOCATION if blank)"""
+        key = self.normalize(name)
+        if not key:
+            return NO_LOCATION
+        location_id = self._ids.get(key)
+        if location_id is None:
+            with self._lock:
+                location_id = self._ids.get(key)
+                if location_id is None:
+                    location_id = len(self._names)
+                    self._names.append(key)
+                    self._ids[key] = location_id
+        return location_id
+
+    def lookup(self, name: str) -> int:
+        """Id of a place name without adding it (UNKNOWN_LOCATION if blank or never interned)"""
+        return self._ids.get(self.normalize(name), UNKNOWN_LOCATION) if name else UNKNOWN_LOCATION
+
+    def ids(self, names: Iterable[str]) -> np.ndarray:
+        """Ids of many place names as an int32 array, interning new ones"""
+        return np.array([self.intern(name) for name in names], dtype=np.int32)
+
+    def lookup_ids(self, names: Iterable[str]) -> np.ndarray:
+        """Ids of many place names as an int32 array, without adding any"""
+        return np.array([self.lookup(name) for name in names], dtype=np.int32)
+
+    def part_ids(self, location: str) -> List[int]:
+        """Ids of the non-empty comma-separated parts of a location string ("Pune, Maharashtra")"""
+        return [self.intern(part) for part in (location or "").split(",") if part.strip()]
+
+    def name(self, location_id: int) -> str:
+        """Normalized place name of an id"""
+        return self._names[location_id]
+
+    def __len__(self) -> int:
+        return len(self._names)
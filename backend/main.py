@@ -5,7 +5,7 @@ FastAPI Backend for SmartPM Skills-Based Job Matching
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import pandas as pd
@@ -21,6 +21,9 @@ from datetime import datetime
 import logging
 from pathlib import Path
 import platform
+import asyncio
+import threading
+from contextlib import asynccontextmanager
 
 # Import the new matchmaking system
 from matchmaking_system import (
@@ -30,6 +33,7 @@ from matchmaking_system import (
     Recommendation,
     matchmaking_system
 )
+from embedding_provider import SharedEmbeddings, embedding_provider_stats
 
 # Import RAG chatbot system (optional)
 import sys
@@ -47,10 +51,64 @@ except ImportError as e:
     RAG_AVAILABLE = False
     RAGModel = None
 
+logger = logging.getLogger(__name__)
+
+# Warm models up in a background thread so the server accepts health checks immediately
+BACKGROUND_WARMUP = os.environ.get("MATCHMAKING_BACKGROUND_WARMUP", "1").lower() in ("1", "true", "yes")
+
+warmup_state = {
+    "status": "pending",
+    "started_at": None,
+    "finished_at": None,
+    "error": None
+}
+
+def warm_up_models():
+    """Load the SBERT model, open the LinUCB store and initialize the RAG model"""
+    warmup_state["status"] = "running"
+    warmup_state["started_at"] = datetime.now().isoformat()
+    try:
+        matchmaking_system.warm_up()
+        if RAG_AVAILABLE:
+            ensure_rag_model()
+        warmup_state["status"] = "done"
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+    finally:
+        warmup_state["finished_at"] = datetime.now().isoformat()
+
+_warmup_lock = threading.Lock()
+_warmup_thread: Optional[threading.Thread] = None
+
+def start_warmup() -> bool:
+    """Start warm-up in a background thread unless it is running or done; returns whether it started"""
+    global _warmup_thread
+    with _warmup_lock:
+        if warmup_state["status"] == "done" or (_warmup_thread is not None and _warmup_thread.is_alive()):
+            return False
+        _warmup_thread = threading.Thread(target=warm_up_models, name="model-warmup", daemon=True)
+        _warmup_thread.start()
+        return True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: nothing heavy happens here, models load lazily or in the background
+    if BACKGROUND_WARMUP:
+        start_warmup()
+    
+    yield
+    
+    # Shutdown: flush LinUCB arms that are only in memory
+    logger.info("👋 Shutting down Smart Internship Match API...")
+    matchmaking_system.shutdown()
+
 app = FastAPI(
     title="Smart Internship Match - Integrated API", 
     description="AI-Powered Internship Matching Platform with Resume Generation and RAG Chatbot",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -65,8 +123,9 @@ app.add_middleware(
 # Global variable for dataset
 jobs_df = None
 
-# Global RAG model instance
+# Global RAG model instance (initialized lazily)
 rag_model = None
+rag_init_lock = threading.Lock()
 
 class SkillsRequest(BaseModel):
     skills: List[str]
@@ -340,6 +399,7 @@ async def root():
         },
         "endpoints": {
             "health": "/health",
+            "readiness": "/api/ready",
             "api_docs": "/docs",
             "matchmaking": "/api/recommendations",
             "resume": "/generate-resume",
@@ -373,6 +433,7 @@ async def health_check():
                 "initialized": rag_model is not None and rag_model.rag_chain is not None if RAG_AVAILABLE else False,
                 "llm_connected": rag_model.test_connection() if rag_model and RAG_AVAILABLE else False
             },
+            "embedding_models": embedding_provider_stats(),
             "services": {
                 "matchmaking": "active",
                 "resume_generation": "active", 
@@ -1155,12 +1216,14 @@ class RecommendationResponse(BaseModel):
     match_score: float
     rank: int
     explanation: Dict[str, Any]
+    impression_id: Optional[str] = None
 
 class MatchmakingRequest(BaseModel):
     """Request model for matchmaking"""
     student_profile: StudentProfileRequest
     internships: List[InternshipRequest]
     top_k: Optional[int] = 10
+    within_state: Optional[bool] = False
 
 class FeedbackRequest(BaseModel):
     """Request model for feedback"""
@@ -1170,6 +1233,7 @@ class FeedbackRequest(BaseModel):
     internship: InternshipRequest
     applied: bool
     approved: bool
+    impression_id: Optional[str] = None  # From the served recommendation; skips recomputing its context
 
 # RAG Chatbot Models
 class ChatRequest(BaseModel):
@@ -1190,6 +1254,7 @@ class RAGHealthResponse(BaseModel):
     message: str
     rag_initialized: bool
     llm_connected: bool
+    embedding_models: List[Dict[str, Any]] = []
 
 # RAG Chatbot Functions
 def initialize_rag_model():
@@ -1202,7 +1267,11 @@ def initialize_rag_model():
         
     try:
         print("🚀 Initializing RAG chatbot system...")
-        rag_model = RAGModel()
+        # Reuse the matchmaking embedding model instead of loading a second copy
+        rag_model = RAGModel(embeddings=SharedEmbeddings(
+            model_name=matchmaking_system.sbert_service.model_name,
+            backend=matchmaking_system.sbert_service.backend
+        ))
         success = rag_model.initialize()
         
         if success:
@@ -1215,8 +1284,16 @@ def initialize_rag_model():
         print(f"❌ Error initializing RAG system: {e}")
         return False
 
-# Initialize RAG model on startup (only if available)
-rag_initialized = initialize_rag_model() if RAG_AVAILABLE else False
+def ensure_rag_model() -> bool:
+    """Initialize the RAG model on first use, retrying after a failed attempt"""
+    if rag_model is not None and rag_model.rag_chain is not None:
+        return True
+    
+    with rag_init_lock:
+        # Another caller may have finished initializing while we waited
+        if rag_model is None or rag_model.rag_chain is None:
+            initialize_rag_model()
+    return rag_model is not None and rag_model.rag_chain is not None
 
 @app.get("/api/rag-health", response_model=RAGHealthResponse)
 async def rag_health_check():
@@ -1238,7 +1315,8 @@ async def rag_health_check():
         status="online" if rag_initialized else "offline",
         message="RAG Chatbot API is running" if rag_initialized else "RAG system not available",
         rag_initialized=rag_initialized,
-        llm_connected=llm_connected
+        llm_connected=llm_connected,
+        embedding_models=embedding_provider_stats()
     )
 
 @app.post("/api/chat", response_model=ChatResponse)
@@ -1255,7 +1333,7 @@ async def chat_with_mentor(request: ChatRequest):
             error="RAG system not available"
         )
     
-    if not rag_model or not rag_model.rag_chain:
+    if not await asyncio.to_thread(ensure_rag_model):
         return ChatResponse(
             response="Sorry, the AI mentor is currently unavailable. Please try again later.",
             status="error",
@@ -1286,7 +1364,7 @@ async def chat_with_mentor(request: ChatRequest):
         )
 
 @app.post("/api/recommendations", response_model=List[RecommendationResponse])
-async def get_recommendations(request: MatchmakingRequest):
+def get_recommendations(request: MatchmakingRequest):
     """Get AI-powered internship recommendations for a student"""
     try:
         # Convert request models to internal models
@@ -1349,7 +1427,7 @@ async def get_recommendations(request: MatchmakingRequest):
         
         # Get recommendations
         recommendations = matchmaking_system.get_recommendations(
-            student, internships, request.top_k
+            student, internships, request.top_k, within_state=bool(request.within_state)
         )
         
         # Convert to response format
@@ -1391,7 +1469,10 @@ async def get_recommendations(request: MatchmakingRequest):
                 "policy_score": rec.explanation.policy_score,
                 "linucb_score": rec.explanation.linucb_score,
                 "final_score": rec.explanation.final_score,
-                "skill_matches": rec.explanation.skill_matches,
+                "skill_matches": [
+                    {"skill": match.skill, "matched_skill": match.matched_skill, "score": match.score}
+                    for match in rec.explanation.skill_matches
+                ],
                 "location_match": rec.explanation.location_match,
                 "equity_boost": rec.explanation.equity_boost,
                 "cgpa_eligibility": rec.explanation.cgpa_eligibility,
@@ -1403,7 +1484,8 @@ async def get_recommendations(request: MatchmakingRequest):
                 internship=internship_resp,
                 match_score=rec.match_score,
                 rank=rec.rank,
-                explanation=explanation_dict
+                explanation=explanation_dict,
+                impression_id=rec.impression_id
             ))
         
         return response
@@ -1413,7 +1495,7 @@ async def get_recommendations(request: MatchmakingRequest):
         raise HTTPException(status_code=500, detail=f"Error getting recommendations: {str(e)}")
 
 @app.post("/api/feedback")
-async def record_feedback(request: FeedbackRequest):
+def record_feedback(request: FeedbackRequest):
     """Record student feedback for adaptive learning"""
     try:
         # Convert request models to internal models
@@ -1478,7 +1560,8 @@ async def record_feedback(request: FeedbackRequest):
             student,
             internship,
             request.applied,
-            request.approved
+            request.approved,
+            impression_id=request.impression_id
         )
         
         return {"status": "success", "message": "Feedback recorded successfully"}
@@ -1488,7 +1571,7 @@ async def record_feedback(request: FeedbackRequest):
         raise HTTPException(status_code=500, detail=f"Error recording feedback: {str(e)}")
 
 @app.get("/api/matchmaking-health")
-async def matchmaking_health_check():
+def matchmaking_health_check():
     """Health check for the matchmaking system"""
     try:
         # Test SBERT model
@@ -1504,6 +1587,11 @@ async def matchmaking_health_check():
             "policy_scorer": "ready",
             "linucb_bandit": "ready",
             "test_sbert_score": sbert_score,
+            "skill_embedding_cache": matchmaking_system.sbert_service.skill_cache.cache_info()._asdict(),
+            "eligibility_filter": matchmaking_system.eligibility_filter.stats(),
+            "impression_store": matchmaking_system.impression_store.stats(),
+            "linucb": matchmaking_system.linucb_bandit.stats(),
+            "embedding_models": embedding_provider_stats(),
             "message": "AI-powered matchmaking system is ready"
         }
     except Exception as e:
@@ -1513,6 +1601,28 @@ async def matchmaking_health_check():
             "message": "Matchmaking system has issues"
         }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness probe: 200 once models are loaded, 503 while warming up (starting it if needed)"""
+    components = {
+        "sbert_model": matchmaking_system.sbert_service.is_loaded,
+        "linucb_store": matchmaking_system.linucb_bandit.is_initialized,
+        "rag_model": rag_model is not None and rag_model.rag_chain is not None if RAG_AVAILABLE else None
+    }
+    ready = matchmaking_system.is_ready
+    if not ready:
+        # Without background warm-up (or after a failed one) nothing else would load the models
+        start_warmup()
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "components": components,
+            "warmup": warmup_state
+        }
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
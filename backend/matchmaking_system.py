@@ -15,17 +15,30 @@ Date: 2025
 
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Callable, FrozenSet
 from dataclasses import dataclass
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import json
 import logging
 from datetime import datetime
-import sqlite3
 import os
+import threading
 from pathlib import Path
 
+from bandit_store import DEFAULT_DB_PATH, ArmParameters, ArmStore, create_arm_table
+from caching import LRUCache
+from embedding_backends import DEFAULT_BACKEND, DEFAULT_MODEL, embedding_backend_name
+from embedding_provider import get_embedding_backend
+from eligibility_filter import EligibilityFilter, FilterReport
+from embedding_store import EmbeddingStore
+from hybrid_linucb import DEFAULT_ARM_FEATURES, HybridLinUCB
+from impression_store import ImpressionStore
+from interaction_log import InteractionLog, create_interaction_table, iter_interactions
+from internship_table import InternshipTable, parse_duration_weeks
+from location_index import LocationIndex
+from skill_vocabulary import SkillVocabulary
+from sqlite_pool import ConnectionPool
+from train_linucb import train as train_linucb
+from vector_index import create_vector_index, top_k_indices
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -86,6 +99,13 @@ class Internship:
     category: str
     company_size: str
 
+@dataclass
+class SkillMatch:
+    """A required internship skill matched to the closest student skill"""
+    skill: str          # skill required by the internship
+    matched_skill: str  # most similar skill of the student
+    score: float        # cosine similarity between the two skill embeddings
+
 @dataclass
 class MatchExplanation:
     """Detailed explanation for a match"""
@@ -93,7 +113,7 @@ class MatchExplanation:
     policy_score: float
     linucb_score: float
     final_score: float
-    skill_matches: List[str]
+    skill_matches: List[SkillMatch]
     location_match: str
     equity_boost: str
     cgpa_eligibility: bool
@@ -107,95 +127,380 @@ class Recommendation:
     match_score: float
     explanation: MatchExplanation
     rank: int
+    impression_id: Optional[str] = None  # Key of the served LinUCB context, quoted back with feedback
+
+@dataclass
+class StudentContext:
+    """Student fields parsed once per request for policy scoring"""
+    profile: StudentProfile
+    income: Optional[float]  # Midpoint of the family income band
+    income_score: Optional[float]
+    stipend_expectation: Optional[float]  # Midpoint of the expected stipend range
+    available_weeks: Optional[float]
+    cgpa: Optional[float]
+    state_key: str  # Place names normalized by LocationIndex.normalize ("" if blank)
+    district_key: str
+    city_key: str
+    preferred_location_keys: FrozenSet[str]
+    student_scores: Dict[str, Tuple[float, str]]  # Student-only policy factors, scored once
+    constant_score: float  # Weighted sum of the student-only factors
+
+# Sides of a match a policy factor can depend on
+STUDENT = "student"
+INTERNSHIP = "internship"
+
+@dataclass(frozen=True)
+class PolicyFactor:
+    """A weighted policy factor and the sides of the match it depends on
+    
+    Factors that do not depend on the internship are scored once per request
+    (``score(context)``) and folded into a constant; the others are scored per
+    internship (``score(context, internship)``) or, when ``score_batch`` is
+    given, for a whole InternshipTable at once (``score_batch(context, table)``).
+    """
+    name: str
+    depends_on: FrozenSet[str]
+    score: Callable[..., Tuple[float, str]]
+    score_batch: Optional[Callable[..., np.ndarray]] = None
+    
+    @property
+    def student_only(self) -> bool:
+        return INTERNSHIP not in self.depends_on
 
 class SBERTEmbeddingService:
     """Service for generating and managing SBERT embeddings"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        """Initialize SBERT model"""
+    def __init__(self, model_name: str = DEFAULT_MODEL,
+                 embedding_store: Optional[EmbeddingStore] = None,
+                 skill_cache_size: int = 4096, skill_cache_ttl: Optional[float] = None,
+                 backend: str = DEFAULT_BACKEND, skill_match_threshold: float = 0.6):
+        """Initialize SBERT model
+        
+        ``model_name`` is any sentence-transformers model; its embedding
+        dimension is discovered from the loaded model. ``backend`` selects the inference backend ('torch', 'onnx' or
+        'onnx-int8', see embedding_backends). Internship embeddings are
+        persisted in ``embedding_store`` (a store for this model and backend in
+        the default directory if not given). Student skill embeddings are kept
+        in an in-process LRU cache keyed by the normalized skill set. Individual
+        internship skills are embedded once into a shared vocabulary matrix used
+        for skill-level matching above ``skill_match_threshold``.
+        """
         self.model_name = model_name
-        self.model = None
-        self._load_model()
+        self.backend = backend
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.embedding_store = embedding_store if embedding_store is not None else EmbeddingStore(
+            model_name=embedding_backend_name(model_name, backend)
+        )
+        self.skill_cache = LRUCache(maxsize=skill_cache_size, ttl=skill_cache_ttl)
+        self.skill_vocabulary = SkillVocabulary(self.encode_texts)
+        self.skill_match_threshold = skill_match_threshold
+    
+    @property
+    def model(self):
+        """The inference backend, loaded on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._load_model()
+        return self._model
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model has been loaded yet"""
+        return self._model is not None
+    
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension of the loaded model"""
+        return int(self.model.get_sentence_embedding_dimension())
     
     def _load_model(self):
         """Load the SBERT model"""
         try:
-            logger.info(f"Loading SBERT model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
+            logger.info(f"Loading SBERT model: {self.model_name} (backend: {self.backend})")
+            # Shared with every other consumer of this model in the process (e.g. RAG)
+            self._model = get_embedding_backend(self.model_name, self.backend, consumer="matchmaking")
             logger.info("SBERT model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load SBERT model: {e}")
             raise
     
+    @staticmethod
+    def normalize_skills(skills: List[str]) -> Tuple[str, ...]:
+        """Canonical form of a skill set: trimmed, lower-cased, de-duplicated, sorted"""
+        return tuple(sorted({skill.strip().lower() for skill in skills if skill and skill.strip()}))
+    
     def encode_skills(self, skills: List[str]) -> np.ndarray:
-        """Encode skills into embeddings"""
-        if not skills:
-            return np.zeros((1, 384))  # Default dimension for all-MiniLM-L6-v2
+        """Encode skills into embeddings (cached per normalized skill set)
         
-        # Combine skills into a single text for better context
-        skills_text = " ".join(skills)
-        return self.model.encode([skills_text])
+        The skills are embedded as given, in their original order and case;
+        only the cache key is normalized, so an equivalent skill set is
+        served the embedding of the first spelling seen.
+        """
+        normalized = self.normalize_skills(skills)
+        if not normalized:
+            return np.zeros((1, self.dimension))
+        
+        def compute():
+            # Combine skills into a single text for better context
+            embedding = np.asarray(self.model.encode([" ".join(skills)]))
+            embedding.setflags(write=False)
+            return embedding
+        
+        return self.skill_cache.get_or_compute(normalized, compute)
     
     def encode_description(self, description: str) -> np.ndarray:
         """Encode job description into embeddings"""
         if not description:
-            return np.zeros((1, 384))
+            return np.zeros((1, self.dimension))
         
         return self.model.encode([description])
     
+    def encode_texts(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Encode many texts with a single batched model call"""
+        if not texts:
+            return np.zeros((0, self.dimension))
+        
+        return np.asarray(self.model.encode(texts, batch_size=batch_size))
+    
+    @staticmethod
+    def build_internship_text(internship_skills: List[str], internship_description: str) -> str:
+        """Build the text that represents an internship for the model"""
+        return " ".join(internship_skills) + " " + internship_description
+    
+    @staticmethod
+    def cosine_scores(query_embedding: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+        """Cosine similarity of one query vector against every row of a matrix"""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.shape[0] == 0:
+            return np.zeros(0, dtype=np.float32)
+        
+        dots = matrix @ query
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        # Zero vectors (e.g. empty skill lists) score 0 instead of NaN
+        return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+    
+    def calculate_similarities(self, student_skills: List[str],
+                               internship_texts: List[str]) -> np.ndarray:
+        """Calculate semantic similarity between a student and many internships
+        
+        The student is encoded once and all internship texts are encoded in a
+        single batched call, then scored with one matrix-vector product.
+        """
+        try:
+            student_embedding = self.encode_skills(student_skills)
+            internship_embeddings = self.encode_texts(internship_texts)
+            return self.cosine_scores(student_embedding, internship_embeddings)
+        except Exception as e:
+            logger.error(f"Error calculating batched SBERT similarity: {e}")
+            return np.zeros(len(internship_texts), dtype=np.float32)
+    
+    def encode_internships(self, internships: List[Internship]) -> np.ndarray:
+        """Encode internships, reusing stored embeddings for unchanged postings"""
+        texts = [self.build_internship_text(internship.skills_required, internship.description)
+                 for internship in internships]
+        ids = [internship.id for internship in internships]
+        return self.embedding_store.get_or_encode(ids, texts, self.encode_texts)
+    
+    def calculate_internship_similarities(self, student_skills: List[str],
+                                          internships: List[Internship]) -> np.ndarray:
+        """Calculate semantic similarity between a student and stored internships"""
+        try:
+            student_embedding = self.encode_skills(student_skills)
+            internship_embeddings = self.encode_internships(internships)
+            return self.cosine_scores(student_embedding, internship_embeddings)
+        except Exception as e:
+            logger.error(f"Error calculating SBERT similarity for internships: {e}")
+            return np.zeros(len(internships), dtype=np.float32)
+    
+    def match_skills(self, student_skills: List[str],
+                     internship_skill_lists: List[List[str]]) -> List[List[SkillMatch]]:
+        """Match each internship's required skills to the student's most similar skill
+        
+        All skills of all internships are scored against the student's skills
+        with a single matrix multiply over the skill vocabulary.
+        """
+        matches: List[List[SkillMatch]] = [[] for _ in internship_skill_lists]
+        student_skills = [skill for skill in student_skills if SkillVocabulary.normalize(skill)]
+        required = [(i, skill) for i, skills in enumerate(internship_skill_lists)
+                    for skill in skills if SkillVocabulary.normalize(skill)]
+        if not student_skills or not required:
+            return matches
+        
+        try:
+            # Student skills are request input: embedded here, never added to the vocabulary
+            student_embeddings = self.skill_vocabulary.embed(student_skills)
+            required_rows = self.skill_vocabulary.rows([skill for _, skill in required])
+            best, scores = self.skill_vocabulary.max_similarity(student_embeddings, required_rows)
+        except Exception as e:
+            logger.error(f"Error matching skills: {e}")
+            return matches
+        
+        for position in np.flatnonzero(scores >= self.skill_match_threshold):
+            internship_position, skill = required[position]
+            matches[internship_position].append(
+                SkillMatch(skill=skill, matched_skill=student_skills[best[position]],
+                           score=round(float(scores[position]), 4))
+            )
+        return matches
+    
     def calculate_similarity(self, student_skills: List[str], 
                            internship_skills: List[str], 
                            internship_description: str) -> float:
         """Calculate semantic similarity between student and internship"""
-        try:
-            # Encode student skills
-            student_embedding = self.encode_skills(student_skills)
-            
-            # Combine internship skills and description
-            internship_text = " ".join(internship_skills) + " " + internship_description
-            internship_embedding = self.encode_description(internship_text)
-            
-            # Calculate cosine similarity
-            similarity = cosine_similarity(student_embedding, internship_embedding)[0][0]
-            
-            return float(similarity)
-        except Exception as e:
-            logger.error(f"Error calculating SBERT similarity: {e}")
-            return 0.0
+        internship_text = self.build_internship_text(internship_skills, internship_description)
+        return float(self.calculate_similarities(student_skills, [internship_text])[0])
 
 class PolicyAwareScoring:
     """Policy-aware scoring system for equity and fairness"""
     
+    EQUITY_CATEGORIES = {
+        'Scheduled Caste (SC)': 1.0,
+        'Scheduled Tribe (ST)': 1.0,
+        'Other Backward Classes (OBC)': 0.8,
+        'Economically Weaker Section (EWS)': 0.8,
+        'Person with Disability (PwD)': 1.0,
+        'Minority': 0.6,
+        'General': 0.0
+    }
+    
     def __init__(self):
-        """Initialize policy scoring weights"""
-        self.weights = {
-            'location': 0.25,
-            'social_category': 0.20,
-            'participation_type': 0.15,
-            'family_income': 0.10,
-            'cgpa_eligibility': 0.15,
-            'stipend_expectation': 0.10,
-            'available_duration': 0.05
-        }
+        """Initialize policy factors and their weights"""
+        self.weights: Dict[str, float] = {}
+        self.factors: Dict[str, PolicyFactor] = {}
+        
+        pair = frozenset({STUDENT, INTERNSHIP})
+        self.register_factor('location', 0.25, pair,
+                             self.calculate_location_score, self._location_scores)
+        self.register_factor('social_category', 0.20, frozenset({STUDENT}),
+                             self.calculate_social_category_score)
+        self.register_factor('participation_type', 0.15, frozenset({STUDENT}),
+                             self.calculate_participation_score)
+        self.register_factor('family_income', 0.10, pair,
+                             self.calculate_income_score, self._income_scores)
+        self.register_factor('cgpa_eligibility', 0.15, pair,
+                             self.calculate_cgpa_eligibility, self._cgpa_scores)
+        self.register_factor('stipend_expectation', 0.10, pair,
+                             self.calculate_stipend_score, self._stipend_scores)
+        self.register_factor('available_duration', 0.05, pair,
+                             self.calculate_duration_score, self._duration_scores)
+    
+    def register_factor(self, name: str, weight: float, depends_on: FrozenSet[str],
+                        score: Callable[..., Tuple[float, str]],
+                        score_batch: Optional[Callable[..., np.ndarray]] = None):
+        """Add (or replace) a weighted policy factor
+        
+        ``depends_on`` is a subset of {STUDENT, INTERNSHIP}; factors without
+        INTERNSHIP are hoisted out of the per-internship loop. Weights should
+        keep summing to 1.
+        """
+        self.factors[name] = PolicyFactor(name, frozenset(depends_on), score, score_batch)
+        self.weights[name] = weight
+    
+    @staticmethod
+    def _parse_amount(text: str) -> Optional[float]:
+        """Amount, or midpoint of a range, from strings like "₹2,00,000 - ₹5,00,000" (None if unparseable)"""
+        if not text:
+            return None
+        parts = text.replace('₹', '').replace(',', '').split(' - ')
+        if len(parts) > 2 or (len(parts) == 1 and '-' in parts[0]):
+            return None
+        try:
+            amounts = [int(part) for part in parts]
+        except ValueError:
+            return None
+        return sum(amounts) / 2 if len(amounts) == 2 else amounts[0]
+    
+    @staticmethod
+    def _parse_weeks(text: str) -> Optional[float]:
+        """Weeks available from strings like "3 months" or "8 weeks" (None if unparseable)"""
+        if not text:
+            return None
+        avail_str = text.lower()
+        digits = ''.join(filter(str.isdigit, avail_str))
+        if not digits:
+            return None
+        if 'month' in avail_str:
+            return int(digits) * 4.33  # Approximate weeks per month
+        elif 'week' in avail_str:
+            return int(digits)
+        return None
+    
+    @staticmethod
+    def _parse_float(value: Any) -> Optional[float]:
+        """Float value of a field such as CGPA (None if missing or unparseable)"""
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
     
-    def calculate_location_score(self, student: StudentProfile, internship: Internship) -> Tuple[float, str]:
+    def compile_student(self, student) -> StudentContext:
+        """Parse a student's policy-relevant fields once per request
+        
+        Accepts a StudentProfile or an already compiled StudentContext.
+        """
+        if isinstance(student, StudentContext):
+            return student
+        
+        income = self._parse_amount(student.family_income)
+        if income is None:
+            income_score = None
+        elif income < 200000:  # Less than 2 lakhs
+            income_score = 1.0
+        elif income < 500000:  # Less than 5 lakhs
+            income_score = 0.8
+        elif income < 1000000:  # Less than 10 lakhs
+            income_score = 0.6
+        else:
+            income_score = 0.4
+        
+        context = StudentContext(
+            profile=student,
+            income=income,
+            income_score=income_score,
+            stipend_expectation=self._parse_amount(student.stipend_expectation),
+            available_weeks=self._parse_weeks(student.available_duration),
+            cgpa=self._parse_float(student.cgpa),
+            state_key=LocationIndex.normalize(student.state),
+            district_key=LocationIndex.normalize(student.district),
+            city_key=LocationIndex.normalize(student.city),
+            preferred_location_keys=frozenset(filter(None, map(LocationIndex.normalize, student.preferred_locations))),
+            student_scores={},
+            constant_score=0.0
+        )
+        
+        # Student-only factors are the same for every internship: score them once
+        for name, factor in self.factors.items():
+            if factor.student_only:
+                context.student_scores[name] = factor.score(context)
+                context.constant_score += context.student_scores[name][0] * self.weights[name]
+        return context
+    
+    def calculate_location_score(self, student, internship: Internship) -> Tuple[float, str]:
         """Calculate location-based score with detailed explanation"""
+        context = self.compile_student(student)
+        city = LocationIndex.normalize(internship.city)
+        district = LocationIndex.normalize(internship.district)
+        state = LocationIndex.normalize(internship.state)
+        same_district = bool(district) and district == context.district_key
+        
         # Exact location match (city + district)
-        if (internship.city == student.city and 
-            internship.district == student.district):
+        if same_district and bool(city) and city == context.city_key:
             return 1.0, f"Exact location match: {internship.city}, {internship.district}"
         
         # Same district
-        if internship.district == student.district:
+        if same_district:
             return 0.8, f"Same district: {internship.district}"
         
         # Same state
-        if internship.state == student.state:
+        if state and state == context.state_key:
             return 0.6, f"Same state: {internship.state}"
         
-        # Preferred location match
-        if any(loc.lower() in internship.location.lower() 
-               for loc in student.preferred_locations):
+        # Preferred location match (city, district, state or a part of the location string)
+        parts = [LocationIndex.normalize(part) for part in (internship.location or "").split(",")]
+        if context.preferred_location_keys.intersection([city, district, state, *parts]):
             return 0.4, f"Matches preferred location: {internship.location}"
         
         # Remote work preference
@@ -204,23 +509,19 @@ class PolicyAwareScoring:
         
         return 0.1, "Different location"
     
-    def calculate_social_category_score(self, student: StudentProfile) -> Tuple[float, str]:
+    def calculate_social_category_score(self, student) -> Tuple[float, str]:
         """Calculate social category equity boost"""
-        equity_categories = {
-            'Scheduled Caste (SC)': 1.0,
-            'Scheduled Tribe (ST)': 1.0,
-            'Other Backward Classes (OBC)': 0.8,
-            'Economically Weaker Section (EWS)': 0.8,
-            'Person with Disability (PwD)': 1.0,
-            'Minority': 0.6,
-            'General': 0.0
-        }
+        if isinstance(student, StudentContext):
+            student = student.profile
         
-        score = equity_categories.get(student.social_category, 0.0)
+        score = self.EQUITY_CATEGORIES.get(student.social_category, 0.0)
         return score, f"Equity boost for {student.social_category}"
     
-    def calculate_participation_score(self, student: StudentProfile) -> Tuple[float, str]:
+    def calculate_participation_score(self, student) -> Tuple[float, str]:
         """Calculate participation type score"""
+        if isinstance(student, StudentContext):
+            student = student.profile
+        
         if student.participation_type == 'first-time':
             return 0.8, "First-time participant support"
         elif student.participation_type == 'returning':
@@ -228,153 +529,107 @@ class PolicyAwareScoring:
         else:
             return 0.5, "Unknown participation type"
     
-    def calculate_income_score(self, student: StudentProfile, internship: Internship) -> Tuple[float, str]:
+    def calculate_income_score(self, student, internship: Internship) -> Tuple[float, str]:
         """Calculate family income-based score"""
-        if not student.family_income or not internship.stipend_amount:
+        context = self.compile_student(student)
+        if not context.profile.family_income or not internship.stipend_amount:
             return 0.5, "Income data not available"
         
-        # Parse income range (assuming format like "₹2,00,000 - ₹5,00,000")
-        try:
-            income_str = student.family_income.replace('₹', '').replace(',', '')
-            if '-' in income_str:
-                min_income, max_income = map(int, income_str.split(' - '))
-                avg_income = (min_income + max_income) / 2
-            else:
-                avg_income = int(income_str)
-            
-            # Higher boost for lower income families
-            if avg_income < 200000:  # Less than 2 lakhs
-                return 1.0, "High priority: Low family income"
-            elif avg_income < 500000:  # Less than 5 lakhs
-                return 0.8, "Medium priority: Moderate family income"
-            elif avg_income < 1000000:  # Less than 10 lakhs
-                return 0.6, "Standard priority: Middle income"
-            else:
-                return 0.4, "Lower priority: Higher family income"
-        except:
+        # Higher boost for lower income families
+        if context.income_score is None:
             return 0.5, "Could not parse income data"
+        if context.income_score == 1.0:
+            return 1.0, "High priority: Low family income"
+        elif context.income_score == 0.8:
+            return 0.8, "Medium priority: Moderate family income"
+        elif context.income_score == 0.6:
+            return 0.6, "Standard priority: Middle income"
+        else:
+            return 0.4, "Lower priority: Higher family income"
     
-    def calculate_cgpa_eligibility(self, student: StudentProfile, internship: Internship) -> Tuple[float, str]:
+    def calculate_cgpa_eligibility(self, student, internship: Internship) -> Tuple[float, str]:
         """Calculate CGPA eligibility score"""
         if not internship.cgpa_requirement:
             return 1.0, "No CGPA requirement specified"
         
-        try:
-            student_cgpa = float(student.cgpa)
-            required_cgpa = float(internship.cgpa_requirement)
-            
-            if student_cgpa >= required_cgpa:
-                # Bonus for exceeding requirement
-                if student_cgpa >= required_cgpa + 0.5:
-                    return 1.0, f"Exceeds CGPA requirement ({student_cgpa} >= {required_cgpa})"
-                else:
-                    return 0.9, f"Meets CGPA requirement ({student_cgpa} >= {required_cgpa})"
-            else:
-                # Partial score for being close
-                if student_cgpa >= required_cgpa - 0.5:
-                    return 0.6, f"Close to CGPA requirement ({student_cgpa} vs {required_cgpa})"
-                else:
-                    return 0.2, f"Below CGPA requirement ({student_cgpa} < {required_cgpa})"
-        except:
+        student_cgpa = self.compile_student(student).cgpa
+        required_cgpa = self._parse_float(internship.cgpa_requirement)
+        if student_cgpa is None or required_cgpa is None:
             return 0.5, "Could not parse CGPA data"
+        
+        if student_cgpa >= required_cgpa:
+            # Bonus for exceeding requirement
+            if student_cgpa >= required_cgpa + 0.5:
+                return 1.0, f"Exceeds CGPA requirement ({student_cgpa} >= {required_cgpa})"
+            else:
+                return 0.9, f"Meets CGPA requirement ({student_cgpa} >= {required_cgpa})"
+        else:
+            # Partial score for being close
+            if student_cgpa >= required_cgpa - 0.5:
+                return 0.6, f"Close to CGPA requirement ({student_cgpa} vs {required_cgpa})"
+            else:
+                return 0.2, f"Below CGPA requirement ({student_cgpa} < {required_cgpa})"
     
-    def calculate_stipend_score(self, student: StudentProfile, internship: Internship) -> Tuple[float, str]:
+    def calculate_stipend_score(self, student, internship: Internship) -> Tuple[float, str]:
         """Calculate stipend expectation match score"""
-        if not student.stipend_expectation or not internship.stipend_amount:
+        context = self.compile_student(student)
+        if not context.profile.stipend_expectation or not internship.stipend_amount:
             return 0.5, "Stipend data not available"
         
-        try:
-            # Parse student expectation (assuming format like "₹5,000 - ₹10,000")
-            exp_str = student.stipend_expectation.replace('₹', '').replace(',', '')
-            if '-' in exp_str:
-                min_exp, max_exp = map(int, exp_str.split(' - '))
-                avg_exp = (min_exp + max_exp) / 2
-            else:
-                avg_exp = int(exp_str)
-            
-            stipend = float(internship.stipend_amount)
-            
-            # Calculate match score
-            if stipend >= avg_exp:
-                return 1.0, f"Stipend meets expectation (₹{stipend:,.0f} >= ₹{avg_exp:,.0f})"
-            elif stipend >= avg_exp * 0.8:
-                return 0.8, f"Stipend close to expectation (₹{stipend:,.0f} vs ₹{avg_exp:,.0f})"
-            elif stipend >= avg_exp * 0.6:
-                return 0.6, f"Stipend below expectation (₹{stipend:,.0f} vs ₹{avg_exp:,.0f})"
-            else:
-                return 0.3, f"Stipend significantly below expectation (₹{stipend:,.0f} vs ₹{avg_exp:,.0f})"
-        except:
+        avg_exp = context.stipend_expectation
+        stipend = self._parse_float(internship.stipend_amount)
+        if avg_exp is None or stipend is None:
             return 0.5, "Could not parse stipend data"
+        
+        # Calculate match score
+        if stipend >= avg_exp:
+            return 1.0, f"Stipend meets expectation (₹{stipend:,.0f} >= ₹{avg_exp:,.0f})"
+        elif stipend >= avg_exp * 0.8:
+            return 0.8, f"Stipend close to expectation (₹{stipend:,.0f} vs ₹{avg_exp:,.0f})"
+        elif stipend >= avg_exp * 0.6:
+            return 0.6, f"Stipend below expectation (₹{stipend:,.0f} vs ₹{avg_exp:,.0f})"
+        else:
+            return 0.3, f"Stipend significantly below expectation (₹{stipend:,.0f} vs ₹{avg_exp:,.0f})"
     
-    def calculate_duration_score(self, student: StudentProfile, internship: Internship) -> Tuple[float, str]:
+    def calculate_duration_score(self, student, internship: Internship) -> Tuple[float, str]:
         """Calculate duration availability score"""
-        if not student.available_duration or not internship.duration_weeks:
+        context = self.compile_student(student)
+        if not context.profile.available_duration or not internship.duration_weeks:
             return 0.5, "Duration data not available"
         
-        try:
-            # Parse student availability (assuming format like "3 months", "6 months")
-            avail_str = student.available_duration.lower()
-            if 'month' in avail_str:
-                months = int(''.join(filter(str.isdigit, avail_str)))
-                student_weeks = months * 4.33  # Approximate weeks per month
-            elif 'week' in avail_str:
-                student_weeks = int(''.join(filter(str.isdigit, avail_str)))
-            else:
-                return 0.5, "Could not parse duration format"
-            
-            internship_weeks = int(internship.duration_weeks)
-            
-            if student_weeks >= internship_weeks:
-                return 1.0, f"Available duration sufficient ({student_weeks:.0f} weeks >= {internship_weeks} weeks)"
-            elif student_weeks >= internship_weeks * 0.8:
-                return 0.8, f"Available duration close to requirement ({student_weeks:.0f} weeks vs {internship_weeks} weeks)"
-            else:
-                return 0.4, f"Available duration below requirement ({student_weeks:.0f} weeks < {internship_weeks} weeks)"
-        except:
+        student_weeks = context.available_weeks
+        if student_weeks is None:
+            return 0.5, "Could not parse duration format"
+        
+        internship_weeks = parse_duration_weeks(internship.duration_weeks)
+        if internship_weeks is None:
             return 0.5, "Could not parse duration data"
+        
+        if student_weeks >= internship_weeks:
+            return 1.0, f"Available duration sufficient ({student_weeks:.0f} weeks >= {internship_weeks} weeks)"
+        elif student_weeks >= internship_weeks * 0.8:
+            return 0.8, f"Available duration close to requirement ({student_weeks:.0f} weeks vs {internship_weeks} weeks)"
+        else:
+            return 0.4, f"Available duration below requirement ({student_weeks:.0f} weeks < {internship_weeks} weeks)"
     
-    def calculate_policy_score(self, student: StudentProfile, internship: Internship) -> Tuple[float, Dict[str, Any]]:
-        """Calculate overall policy-aware score"""
+    def calculate_policy_score(self, student, internship: Internship) -> Tuple[float, Dict[str, Any]]:
+        """Calculate overall policy-aware score
+        
+        ``student`` is a StudentProfile or a StudentContext from
+        compile_student; pass the context when scoring many internships.
+        """
+        context = self.compile_student(student)
         scores = {}
         explanations = {}
         
-        # Location score
-        loc_score, loc_explanation = self.calculate_location_score(student, internship)
-        scores['location'] = loc_score
-        explanations['location'] = loc_explanation
-        
-        # Social category score
-        soc_score, soc_explanation = self.calculate_social_category_score(student)
-        scores['social_category'] = soc_score
-        explanations['social_category'] = soc_explanation
-        
-        # Participation type score
-        part_score, part_explanation = self.calculate_participation_score(student)
-        scores['participation_type'] = part_score
-        explanations['participation_type'] = part_explanation
-        
-        # Family income score
-        inc_score, inc_explanation = self.calculate_income_score(student, internship)
-        scores['family_income'] = inc_score
-        explanations['family_income'] = inc_explanation
-        
-        # CGPA eligibility score
-        cgpa_score, cgpa_explanation = self.calculate_cgpa_eligibility(student, internship)
-        scores['cgpa_eligibility'] = cgpa_score
-        explanations['cgpa_eligibility'] = cgpa_explanation
-        
-        # Stipend expectation score
-        stip_score, stip_explanation = self.calculate_stipend_score(student, internship)
-        scores['stipend_expectation'] = stip_score
-        explanations['stipend_expectation'] = stip_explanation
-        
-        # Duration availability score
-        dur_score, dur_explanation = self.calculate_duration_score(student, internship)
-        scores['available_duration'] = dur_score
-        explanations['available_duration'] = dur_explanation
-        
-        # Calculate weighted average
-        total_score = sum(scores[key] * self.weights[key] for key in scores)
+        # Weighted sum: student-only factors were folded into the context's constant
+        total_score = context.constant_score
+        for name, factor in self.factors.items():
+            if factor.student_only:
+                scores[name], explanations[name] = context.student_scores[name]
+            else:
+                scores[name], explanations[name] = factor.score(context, internship)
+                total_score += scores[name] * self.weights[name]
         
         return total_score, {
             'scores': scores,
@@ -382,152 +637,287 @@ class PolicyAwareScoring:
             'weights': self.weights
         }
 
+    def calculate_policy_scores(self, student,
+                                table: InternshipTable) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Calculate policy scores for a whole internship table in one vectorized pass
+        
+        Returns the weighted score vector and the per-component score vectors;
+        scores match calculate_policy_score row by row. Explanation strings are
+        not built here, see calculate_policy_score for the top-ranked ones.
+        """
+        context = self.compile_student(student)
+        n = len(table)
+        scores = {}
+        
+        total_score = np.full(n, context.constant_score)
+        for name, factor in self.factors.items():
+            if factor.student_only:
+                scores[name] = np.full(n, context.student_scores[name][0])
+                continue
+            if factor.score_batch is not None:
+                scores[name] = factor.score_batch(context, table)
+            else:
+                scores[name] = np.array([factor.score(context, internship)[0] for internship in table.internships],
+                                        dtype=np.float64)
+            total_score += scores[name] * self.weights[name]
+        
+        return total_score, scores
+    
+    def _location_scores(self, context: StudentContext, table: InternshipTable) -> np.ndarray:
+        """Vectorized calculate_location_score: integer comparisons on interned location ids"""
+        city_id, district_id, state_id = table.locations.lookup_ids(
+            [context.city_key, context.district_key, context.state_key])
+        same_district = table.district_id == district_id
+        return np.select(
+            [
+                (table.city_id == city_id) & same_district,
+                same_district,
+                table.state_id == state_id,
+                table.in_locations(table.locations.lookup_ids(context.preferred_location_keys)),
+                table.is_remote,
+            ],
+            [1.0, 0.8, 0.6, 0.4, 0.3],
+            default=0.1
+        )
+    
+    def _income_scores(self, context: StudentContext, table: InternshipTable) -> np.ndarray:
+        """Vectorized calculate_income_score: depends on the internship only through stipend availability"""
+        income_score = 0.5 if context.income_score is None else context.income_score
+        return np.where(table.has_stipend, income_score, 0.5)
+    
+    def _cgpa_scores(self, context: StudentContext, table: InternshipTable) -> np.ndarray:
+        """Vectorized calculate_cgpa_eligibility"""
+        if context.cgpa is None:
+            return np.where(table.has_cgpa_requirement, 0.5, 1.0)
+        required = table.cgpa_requirement
+        cgpa_scores = np.select(
+            [required + 0.5 <= context.cgpa, required <= context.cgpa, required - 0.5 <= context.cgpa],
+            [1.0, 0.9, 0.6],
+            default=0.2
+        )
+        return np.where(table.has_cgpa_requirement, cgpa_scores, 1.0)
+    
+    def _stipend_scores(self, context: StudentContext, table: InternshipTable) -> np.ndarray:
+        """Vectorized calculate_stipend_score"""
+        if context.stipend_expectation is None:
+            return np.full(len(table), 0.5)
+        avg_exp = context.stipend_expectation
+        stipend = table.stipend
+        return np.where(
+            table.has_stipend,
+            np.select([stipend >= avg_exp, stipend >= avg_exp * 0.8, stipend >= avg_exp * 0.6],
+                      [1.0, 0.8, 0.6], default=0.3),
+            0.5
+        )
+    
+    def _duration_scores(self, context: StudentContext, table: InternshipTable) -> np.ndarray:
+        """Vectorized calculate_duration_score"""
+        if context.available_weeks is None:
+            return np.full(len(table), 0.5)
+        student_weeks = context.available_weeks
+        weeks = table.duration_weeks
+        return np.where(
+            table.has_duration,
+            np.select([student_weeks >= weeks, student_weeks >= weeks * 0.8], [1.0, 0.8], default=0.4),
+            0.5
+        )
+
+# 'disjoint' (one full arm per internship) or 'hybrid' (shared + small per-arm blocks, see hybrid_linucb.py)
+LINUCB_MODES = ("disjoint", "hybrid")
+DEFAULT_LINUCB_MODE = os.environ.get("MATCHMAKING_LINUCB_MODE", "disjoint")
+
 class LinUCBContextualBandit:
     """LinUCB contextual bandit for adaptive learning"""
     
-    def __init__(self, context_dim: int = 50, alpha: float = 1.0):
-        """Initialize LinUCB bandit"""
+    def __init__(self, context_dim: int = 50, alpha: float = 1.0, reinversion_interval: int = 100,
+                 flush_interval: float = 2.0, db_path: Optional[str] = None, mode: Optional[str] = None):
+        """Initialize LinUCB bandit
+        
+        Each arm keeps A⁻¹ and θ up to date with rank-one (Sherman–Morrison)
+        updates, so scoring never inverts a matrix; every
+        ``reinversion_interval`` updates of an arm A⁻¹ is recomputed exactly
+        to bound numerical drift.
+        
+        Arms are loaded into memory once (see bandit_store.ArmStore) and
+        changed arms are written back every ``flush_interval`` seconds and on
+        ``close()``. Feedback is committed to the interaction log (see
+        interaction_log.py) before it reaches an arm, so arms can be rebuilt
+        after a crash.
+        
+        The database lives at ``db_path`` (default ``MATCHMAKING_DB_PATH``,
+        else matchmaking_learning.db) and is opened in WAL mode through a
+        per-thread connection pool (see sqlite_pool.py).
+        
+        ``mode='hybrid'`` (default ``MATCHMAKING_LINUCB_MODE``) replaces the
+        per-internship arms with a hybrid model whose shared parameters let
+        internships without feedback borrow from similar ones. It keeps no
+        arm table: its state is rebuilt from the interaction log on startup.
+        """
+        self.mode = mode or DEFAULT_LINUCB_MODE
+        if self.mode not in LINUCB_MODES:
+            raise ValueError(f"Unknown LinUCB mode '{self.mode}', expected one of {list(LINUCB_MODES)}")
         self.context_dim = context_dim
         self.alpha = alpha
-        self.arms = {}  # internship_id -> arm parameters
-        self.db_path = "matchmaking_learning.db"
-        self._init_database()
+        self.reinversion_interval = reinversion_interval
+        self.flush_interval = flush_interval
+        self.arms: Optional[ArmStore] = None  # internship_id -> arm parameters, once the database is up
+        self.hybrid: Optional[HybridLinUCB] = None  # Instead of arms in hybrid mode
+        self._hybrid_applied_id = 0
+        self._apply_lock = threading.Lock()
+        self.interaction_log: Optional[InteractionLog] = None
+        self.pool: Optional[ConnectionPool] = None
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self._db_initialized = False
+        self._db_lock = threading.Lock()
+    
+    @property
+    def is_initialized(self) -> bool:
+        """Whether the learning database has been set up yet"""
+        return self._db_initialized
+    
+    def ensure_database(self):
+        """Create the learning database on first use"""
+        if not self._db_initialized:
+            with self._db_lock:
+                if not self._db_initialized:
+                    self._db_initialized = self._init_database()
     
-    def _init_database(self):
+    def _init_database(self) -> bool:
         """Initialize SQLite database for learning data"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.pool = ConnectionPool(self.db_path)
+            conn = self.pool.connection()
             cursor = conn.cursor()
             
             # Create tables for learning data
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS interactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id TEXT,
-                    internship_id TEXT,
-                    context_vector TEXT,
-                    reward REAL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            create_interaction_table(cursor)
             
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS arm_parameters (
-                    internship_id TEXT PRIMARY KEY,
-                    A_matrix TEXT,
-                    b_vector TEXT,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # Arm parameters as binary BLOBs (JSON-text tables are migrated in place)
+            create_arm_table(cursor)
             
             conn.commit()
-            conn.close()
+            
+            if self.mode == "hybrid":
+                # Order-independent sufficient statistics: one vectorized pass over the log
+                self.hybrid = self._new_hybrid()
+                count, self._hybrid_applied_id = self.hybrid.fit_log(self.db_path)
+                logger.info(f"Hybrid LinUCB rebuilt from {count} interactions ({len(self.hybrid)} arms)")
+            else:
+                # Load every arm (replaying interactions that were never flushed)
+                self.arms = ArmStore(self.db_path, self.context_dim, self.reinversion_interval,
+                                     flush_interval=self.flush_interval, pool=self.pool)
+                self.arms.load()
+                self.arms.start()
+            
+            # Committed feedback is applied to the arms by the log's writer, in log order
+            self.interaction_log = InteractionLog(self.db_path, on_commit=self._apply_interactions, pool=self.pool)
             logger.info("LinUCB database initialized successfully")
+            return True
         except Exception as e:
             logger.error(f"Failed to initialize LinUCB database: {e}")
+            return False
     
-    def _create_context_vector(self, student: StudentProfile, internship: Internship, 
-                             sbert_score: float, policy_score: float) -> np.ndarray:
-        """Create context vector for LinUCB"""
-        # Combine various features into context vector
-        context = []
+    # Number of leading context features; the rest of the vector is zero padding
+    NUM_CONTEXT_FEATURES = 15
+    
+    def _student_features(self, student) -> np.ndarray:
+        """The six student features of the context vector (from a StudentProfile or StudentContext)"""
+        if isinstance(student, StudentContext):
+            profile, cgpa = student.profile, student.cgpa
+        else:
+            profile, cgpa = student, PolicyAwareScoring._parse_float(student.cgpa)
+        return np.array([
+            cgpa or 0.0,
+            len(profile.skills),
+            1.0 if profile.participation_type == 'first-time' else 0.0,
+            1.0 if profile.social_category in ['Scheduled Caste (SC)', 'Scheduled Tribe (ST)'] else 0.0,
+            1.0 if profile.social_category in ['Other Backward Classes (OBC)', 'Economically Weaker Section (EWS)'] else 0.0,
+            1.0 if profile.social_category == 'Person with Disability (PwD)' else 0.0,
+        ], dtype=np.float32)
+    
+    def create_context_matrix(self, student, table: InternshipTable, sbert_scores: np.ndarray,
+                              policy_scores: np.ndarray,
+                              location_scores: Optional[np.ndarray] = None) -> np.ndarray:
+        """Context vectors of one student against every row of ``table`` as an (N × context_dim) float32 matrix
+        
+        Columns: 6 student features (broadcast), 6 internship features read
+        from the table columns, the SBERT and policy scores, and the location
+        match (1.0 same city and district, 0.8 same district, 0.6 same state,
+        else 0), zero-padded to ``context_dim``. ``location_scores`` can be
+        the policy scorer's 'location' component, whose top three tiers are
+        exactly these values; otherwise they are compared from location ids.
+        """
+        n = len(table)
+        features = np.zeros((n, max(self.context_dim, self.NUM_CONTEXT_FEATURES)), dtype=np.float32)
         
         # Student features
-        context.extend([
-            float(student.cgpa) if student.cgpa else 0.0,
-            len(student.skills),
-            1.0 if student.participation_type == 'first-time' else 0.0,
-            1.0 if student.social_category in ['Scheduled Caste (SC)', 'Scheduled Tribe (ST)'] else 0.0,
-            1.0 if student.social_category in ['Other Backward Classes (OBC)', 'Economically Weaker Section (EWS)'] else 0.0,
-            1.0 if student.social_category == 'Person with Disability (PwD)' else 0.0,
-        ])
-        
-        # Internship features
-        context.extend([
-            float(internship.cgpa_requirement) if internship.cgpa_requirement else 0.0,
-            len(internship.skills_required),
-            float(internship.stipend_amount) if internship.stipend_amount else 0.0,
-            float(internship.duration_weeks) if internship.duration_weeks else 0.0,
-            1.0 if internship.internship_type == 'remote' else 0.0,
-            1.0 if internship.internship_type == 'hybrid' else 0.0,
-        ])
+        features[:, 0:6] = self._student_features(student)
+        
+        # Internship features (missing values are 0)
+        features[:, 6] = np.nan_to_num(table.cgpa_requirement)
+        features[:, 7] = table.num_skills
+        features[:, 8] = np.nan_to_num(table.stipend)
+        features[:, 9] = np.nan_to_num(table.duration_weeks)
+        features[:, 10] = table.is_remote
+        features[:, 11] = table.is_hybrid
         
         # Match scores
-        context.extend([sbert_score, policy_score])
-        
-        # Location match features
-        location_match = 0.0
-        if internship.city == student.city and internship.district == student.district:
-            location_match = 1.0
-        elif internship.district == student.district:
-            location_match = 0.8
-        elif internship.state == student.state:
-            location_match = 0.6
-        context.append(location_match)
-        
-        # Pad or truncate to context_dim
-        while len(context) < self.context_dim:
-            context.append(0.0)
-        context = context[:self.context_dim]
-        
-        return np.array(context, dtype=np.float32)
-    
-    def _get_arm_parameters(self, internship_id: str) -> Tuple[np.ndarray, np.ndarray]:
-        """Get arm parameters from database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT A_matrix, b_vector FROM arm_parameters WHERE internship_id = ?",
-                (internship_id,)
-            )
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                A_matrix = np.array(json.loads(result[0]))
-                b_vector = np.array(json.loads(result[1]))
-                return A_matrix, b_vector
+        features[:, 12] = sbert_scores
+        features[:, 13] = policy_scores
+        
+        # Location match
+        if location_scores is None:
+            if isinstance(student, StudentContext):
+                names = [student.state_key, student.district_key, student.city_key]
             else:
-                # Initialize new arm
-                A_matrix = np.eye(self.context_dim)
-                b_vector = np.zeros(self.context_dim)
-                return A_matrix, b_vector
-        except Exception as e:
-            logger.error(f"Error getting arm parameters: {e}")
-            return np.eye(self.context_dim), np.zeros(self.context_dim)
-    
-    def _update_arm_parameters(self, internship_id: str, A_matrix: np.ndarray, b_vector: np.ndarray):
-        """Update arm parameters in database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT OR REPLACE INTO arm_parameters (internship_id, A_matrix, b_vector) VALUES (?, ?, ?)",
-                (internship_id, json.dumps(A_matrix.tolist()), json.dumps(b_vector.tolist()))
+                names = [student.state, student.district, student.city]
+            state_id, district_id, city_id = table.locations.lookup_ids(names)
+            same_district = table.district_id == district_id
+            location_scores = np.select(
+                [(table.city_id == city_id) & same_district, same_district, table.state_id == state_id],
+                [1.0, 0.8, 0.6],
+                default=0.0
             )
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error updating arm parameters: {e}")
+        else:
+            location_scores = np.where(np.asarray(location_scores) >= 0.6, location_scores, 0.0)
+        features[:, 14] = location_scores
+        
+        # Truncate if context_dim is smaller than the feature count
+        return features[:, :self.context_dim]
     
-    def _record_interaction(self, student_id: str, internship_id: str, 
-                          context_vector: np.ndarray, reward: float):
-        """Record interaction for learning"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "INSERT INTO interactions (student_id, internship_id, context_vector, reward) VALUES (?, ?, ?, ?)",
-                (student_id, internship_id, json.dumps(context_vector.tolist()), reward)
-            )
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error recording interaction: {e}")
+    def _create_context_vector(self, student: StudentProfile, internship: Internship, 
+                             sbert_score: float, policy_score: float) -> np.ndarray:
+        """Create context vector for LinUCB (one row of create_context_matrix)"""
+        return self.create_context_matrix(student, InternshipTable([internship]), np.array([sbert_score]),
+                                          np.array([policy_score]))[0]
+    
+    def _get_arm_parameters(self, internship_id: str) -> ArmParameters:
+        """Get arm parameters from the in-memory arm store"""
+        self.ensure_database()
+        if self.arms is None:
+            return ArmParameters.initial(self.context_dim)
+        return self.arms.get(internship_id)
+    
+    def _new_hybrid(self) -> HybridLinUCB:
+        # Contexts are truncated to context_dim: only keep the match-score columns that survive
+        shared_dim = min(self.NUM_CONTEXT_FEATURES, self.context_dim)
+        arm_features = [column for column in DEFAULT_ARM_FEATURES if column < shared_dim]
+        return HybridLinUCB(shared_dim=shared_dim, arm_features=arm_features, alpha=self.alpha,
+                            recompute_interval=self.reinversion_interval)
+    
+    def _apply_interactions(self, interactions):
+        """Rank-one updates of A, b, A⁻¹ and θ for committed interactions; persisted by the next flush"""
+        if self.hybrid is not None:
+            with self._apply_lock:
+                for interaction_id, internship_id, context_vector, reward in interactions:
+                    self.hybrid.update(internship_id, context_vector, reward)
+                    self._hybrid_applied_id = interaction_id
+            return
+        for interaction_id, internship_id, context_vector, reward in interactions:
+            self.arms.update(internship_id, context_vector, reward, interaction_id)
     
     def select_arm(self, student: StudentProfile, internship: Internship, 
                    sbert_score: float, policy_score: float) -> Tuple[float, float]:
@@ -535,51 +925,169 @@ class LinUCBContextualBandit:
         internship_id = internship.id
         context_vector = self._create_context_vector(student, internship, sbert_score, policy_score)
         
-        # Get arm parameters
-        A_matrix, b_vector = self._get_arm_parameters(internship_id)
+        self.ensure_database()
+        if self.hybrid is not None:
+            scores, confidences = self.hybrid.score_batch(context_vector[None, :], [internship_id])
+            return float(scores[0]), float(confidences[0])
         
-        try:
-            # Calculate LinUCB score
-            A_inv = np.linalg.inv(A_matrix)
-            theta = A_inv @ b_vector
-            
-            # Calculate upper confidence bound
-            confidence = self.alpha * np.sqrt(context_vector.T @ A_inv @ context_vector)
-            linucb_score = theta.T @ context_vector + confidence
-            
-            return float(linucb_score), float(confidence)
-        except np.linalg.LinAlgError:
-            # Fallback if matrix is singular
-            return 0.5, 0.1
+        # Get arm parameters (A⁻¹ and θ are maintained on update, nothing to invert here)
+        arm = self._get_arm_parameters(internship_id)
+        
+        # Calculate upper confidence bound; clamp tiny negative variances from rounding
+        variance = float(context_vector @ arm.A_inv @ context_vector)
+        confidence = self.alpha * np.sqrt(max(variance, 0.0))
+        linucb_score = arm.theta @ context_vector + confidence
+        
+        return float(linucb_score), float(confidence)
+    
+    def score_batch(self, contexts: np.ndarray, arm_ids: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """UCB scores and confidences of many (context, arm) pairs at once
+        
+        ``contexts`` is an (N × context_dim) matrix whose row i is scored
+        against arm ``arm_ids[i]``. θ and A⁻¹ of the arms with feedback are
+        stacked and scored with einsum; arms without feedback use the prior
+        (θ = 0, A⁻¹ = I), i.e. a pure exploration bonus. Same results as
+        ``select_arm`` per pair.
+        """
+        self.ensure_database()
+        if self.hybrid is not None:
+            return self.hybrid.score_batch(np.asarray(contexts).reshape(len(arm_ids), self.context_dim), arm_ids)
+        X = np.asarray(contexts, dtype=np.float64).reshape(len(arm_ids), self.context_dim)
+        
+        # Prior for every row: θ·x = 0 and xᵀA⁻¹x = xᵀx
+        expected = np.zeros(len(arm_ids))
+        variances = np.einsum('ij,ij->i', X, X)
+        
+        seen = [i for i, arm_id in enumerate(arm_ids) if self.arms is not None and arm_id in self.arms]
+        if seen:
+            arms = [self.arms.get(arm_ids[i]) for i in seen]
+            thetas = np.stack([arm.theta for arm in arms])  # (M, d)
+            A_invs = np.stack([arm.A_inv for arm in arms])  # (M, d, d)
+            X_seen = X[seen]
+            expected[seen] = np.einsum('ij,ij->i', thetas, X_seen)
+            variances[seen] = np.einsum('ij,ijk,ik->i', X_seen, A_invs, X_seen)
+        
+        # Clamp tiny negative variances from rounding
+        confidences = self.alpha * np.sqrt(np.maximum(variances, 0.0))
+        return expected + confidences, confidences
     
     def update_arm(self, student_id: str, internship_id: str, 
                    context_vector: np.ndarray, reward: float):
-        """Update arm parameters based on feedback"""
+        """Update arm parameters based on feedback
+        
+        Blocks until the interaction is committed (sharing the transaction
+        with concurrent feedback) and applied to the in-memory arm. Arms are
+        updated in log order only after the commit, so an arm flushed later
+        never includes feedback that is missing from the interactions table.
+        """
         try:
-            # Get current parameters
-            A_matrix, b_vector = self._get_arm_parameters(internship_id)
-            
-            # Update parameters
-            A_matrix += np.outer(context_vector, context_vector)
-            b_vector += reward * context_vector
-            
-            # Save updated parameters
-            self._update_arm_parameters(internship_id, A_matrix, b_vector)
+            self.ensure_database()
+            if self.interaction_log is None:
+                logger.error("LinUCB database unavailable, feedback not applied")
+                return
             
-            # Record interaction
-            self._record_interaction(student_id, internship_id, context_vector, reward)
+            if self.interaction_log.append(student_id, internship_id, context_vector, reward) is None:
+                logger.error(f"Feedback for {internship_id} was not confirmed as stored")
             
         except Exception as e:
             logger.error(f"Error updating arm: {e}")
+    
+    def retrain(self, chunk_size: int = 100000) -> int:
+        """Rebuild every arm from the interaction log in one batch pass and swap them in
+        
+        Feedback keeps flowing while training runs: interactions applied
+        after the training snapshot are replayed onto the new arms during the
+        swap. Returns the number of interactions trained on.
+        """
+        self.ensure_database()
+        if self.hybrid is not None:
+            return self._retrain_hybrid(chunk_size)
+        if self.arms is None:
+            return 0
+        trained_through = self.arms.applied_interaction_id
+        arms, count, _ = train_linucb(self.db_path, self.context_dim, chunk_size, until_id=trained_through)
+        self.arms.swap(arms, trained_through)
+        return count
+    
+    def _retrain_hybrid(self, chunk_size: int) -> int:
+        """Rebuild the hybrid model from the log (discarding rounding drift) and swap it in"""
+        trained_through = self._hybrid_applied_id
+        model = self._new_hybrid()
+        count, _ = model.fit_log(self.db_path, chunk_size, until_id=trained_through)
+        with self._apply_lock:
+            # Feedback applied to the live model while training ran
+            for batch in iter_interactions(self.db_path, chunk_size, since_id=trained_through):
+                keep = batch.ids <= self._hybrid_applied_id
+                if keep.any():
+                    model.fit(batch.internship_ids[keep], batch.contexts[keep], batch.rewards[keep])
+                if not keep.all():
+                    break
+            self.hybrid = model
+        return count
+    
+    def stats(self) -> Dict[str, Any]:
+        """Mode, learned arms and their parameter memory"""
+        if self.hybrid is not None:
+            return {"mode": self.mode, **self.hybrid.stats()}
+        arms = len(self.arms) if self.arms is not None else 0
+        return {"mode": self.mode, "arms": arms,
+                "parameter_bytes": 8 * arms * (2 * self.context_dim ** 2 + 2 * self.context_dim)}
+    
+    def flush(self) -> int:
+        """Write arms changed since the last flush to the database now"""
+        return self.arms.flush() if self.arms is not None else 0
+    
+    def close(self):
+        """Commit queued feedback, stop background flushing and persist every pending arm"""
+        if self.interaction_log is not None:
+            self.interaction_log.close()
+        if self.arms is not None:
+            self.arms.close()
+        if self.pool is not None:
+            self.pool.close_all()
 
 class AdvancedMatchmakingSystem:
     """Main matchmaking system that combines all components"""
     
-    def __init__(self):
-        """Initialize the matchmaking system"""
-        self.sbert_service = SBERTEmbeddingService()
+    def __init__(self, candidate_pool_size: Optional[int] = 300, index_backend: str = "auto",
+                 model_name: str = DEFAULT_MODEL, embedding_backend: str = DEFAULT_BACKEND,
+                 eligibility_filter: Optional[EligibilityFilter] = None,
+                 impression_store: Optional[ImpressionStore] = None,
+                 embedding_store: Optional[EmbeddingStore] = None, db_path: Optional[str] = None):
+        """Initialize the matchmaking system
+        
+        ``model_name`` and ``embedding_backend`` pick the embedding model and
+        its inference backend (see embedding_backends); use
+        benchmark_embeddings.py to choose the cheapest adequate model.
+        
+        When there are more active internships than ``candidate_pool_size``,
+        only the most semantically similar ones (retrieved from a vector index
+        over the stored internship embeddings) go through policy and LinUCB
+        scoring. ``None`` scores every active internship.
+        
+        ``eligibility_filter`` drops internships the student can never take
+        (inactive, past deadline, no open positions, CGPA far too low) before
+        any model work; see eligibility_filter.py.
+        
+        ``impression_store`` keeps the LinUCB context vector of each served
+        recommendation so ``record_feedback`` can reuse it by impression id.
+        
+        ``embedding_store`` and ``db_path`` override where internship
+        embeddings and the LinUCB learning database are kept.
+        """
+        self.sbert_service = SBERTEmbeddingService(model_name=model_name, backend=embedding_backend,
+                                                   embedding_store=embedding_store)
         self.policy_scorer = PolicyAwareScoring()
-        self.linucb_bandit = LinUCBContextualBandit()
+        self.linucb_bandit = LinUCBContextualBandit(db_path=db_path)
+        self.eligibility_filter = eligibility_filter if eligibility_filter is not None else EligibilityFilter()
+        self.impression_store = impression_store if impression_store is not None else ImpressionStore()
+        
+        # Retrieve-then-rank configuration
+        self.candidate_pool_size = candidate_pool_size
+        self.index_backend = index_backend
+        self._vector_index = None
+        self._vector_index_fingerprint = None
+        self._index_lock = threading.Lock()
         
         # Scoring weights
         self.weights = {
@@ -588,15 +1096,36 @@ class AdvancedMatchmakingSystem:
             'linucb': 0.2      # 20% for adaptive learning
         }
     
-    def calculate_match(self, student: StudentProfile, internship: Internship) -> Recommendation:
-        """Calculate comprehensive match score and explanation"""
+    @property
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and the learning store is open"""
+        return self.sbert_service.is_loaded and self.linucb_bandit.is_initialized
+    
+    def warm_up(self):
+        """Load the model and open the learning store ahead of the first request"""
+        self.sbert_service.encode_texts(["warm up"])
+        self.linucb_bandit.ensure_database()
+    
+    def shutdown(self):
+        """Persist learning state that is still only in memory"""
+        self.linucb_bandit.close()
+    
+    def calculate_match(self, student: StudentProfile, internship: Internship,
+                        sbert_score: Optional[float] = None,
+                        skill_matches: Optional[List[SkillMatch]] = None) -> Recommendation:
+        """Calculate comprehensive match score and explanation
+        
+        ``sbert_score`` and ``skill_matches`` can be passed in when they were
+        already computed as part of a batch, which skips the per-pair work.
+        """
         
         # 1. Calculate SBERT semantic similarity
-        sbert_score = self.sbert_service.calculate_similarity(
-            student.skills,
-            internship.skills_required,
-            internship.description
-        )
+        if sbert_score is None:
+            sbert_score = self.sbert_service.calculate_similarity(
+                student.skills,
+                internship.skills_required,
+                internship.description
+            )
         
         # 2. Calculate policy-aware score
         policy_score, policy_details = self.policy_scorer.calculate_policy_score(student, internship)
@@ -613,13 +1142,32 @@ class AdvancedMatchmakingSystem:
             self.weights['linucb'] * linucb_score
         )
         
-        # 5. Create detailed explanation
+        if skill_matches is None:
+            skill_matches = self._find_skill_matches(student.skills, internship.skills_required)
+        
+        return self._build_recommendation(student, internship, sbert_score, policy_score, linucb_score,
+                                          confidence, final_score, skill_matches, policy_details)
+    
+    def _build_recommendation(self, student: StudentProfile, internship: Internship,
+                              sbert_score: float, policy_score: float, linucb_score: float,
+                              confidence: float, final_score: float, skill_matches: List[SkillMatch],
+                              policy_details: Optional[Dict[str, Any]] = None,
+                              rank: int = 0,
+                              student_context: Optional[StudentContext] = None) -> Recommendation:
+        """Build a recommendation with its detailed explanation
+        
+        Policy explanation strings are generated here when not supplied, so
+        batch scoring only pays for them on the recommendations it returns.
+        """
+        if policy_details is None:
+            _, policy_details = self.policy_scorer.calculate_policy_score(student_context or student, internship)
+        
         explanation = MatchExplanation(
             sbert_score=sbert_score,
             policy_score=policy_score,
             linucb_score=linucb_score,
             final_score=final_score,
-            skill_matches=self._find_skill_matches(student.skills, internship.skills_required),
+            skill_matches=skill_matches,
             location_match=policy_details['explanations']['location'],
             equity_boost=policy_details['explanations']['social_category'],
             cgpa_eligibility=policy_details['scores']['cgpa_eligibility'] > 0.5,
@@ -631,57 +1179,156 @@ class AdvancedMatchmakingSystem:
             internship=internship,
             match_score=final_score,
             explanation=explanation,
-            rank=0  # Will be set when ranking
+            rank=rank  # 0 until ranked
         )
     
-    def _find_skill_matches(self, student_skills: List[str], internship_skills: List[str]) -> List[str]:
+    def _find_skill_matches(self, student_skills: List[str], internship_skills: List[str]) -> List[SkillMatch]:
         """Find matching skills between student and internship"""
-        matches = []
-        for skill in internship_skills:
-            for student_skill in student_skills:
-                if (skill.lower() in student_skill.lower() or 
-                    student_skill.lower() in skill.lower()):
-                    matches.append(skill)
-                    break
-        return matches
+        return self.sbert_service.match_skills(student_skills, [internship_skills])[0]
+    
+    def _get_vector_index(self, candidates: List[Internship], embeddings: np.ndarray):
+        """Return the vector index for this candidate set, rebuilding it only when the catalogue changes"""
+        fingerprint = self.sbert_service.embedding_store.fingerprint([c.id for c in candidates])
+        with self._index_lock:
+            if fingerprint != self._vector_index_fingerprint:
+                index = create_vector_index(self.index_backend, len(candidates))
+                index.build(embeddings)
+                self._vector_index = index
+                self._vector_index_fingerprint = fingerprint
+                logger.info(f"Built {type(index).__name__} over {len(candidates)} internships")
+            return self._vector_index
+    
+    def _retrieve_candidates(self, student: StudentProfile, candidates: List[Internship],
+                             allowed: Optional[np.ndarray] = None) -> Tuple[List[Internship], np.ndarray]:
+        """Stage 1: narrow the candidates down to the most semantically similar pool
+        
+        ``allowed`` is an optional boolean mask over ``candidates``; rows
+        outside it are never returned. Returns the pool together with its
+        SBERT scores.
+        """
+        num_allowed = len(candidates) if allowed is None else int(np.count_nonzero(allowed))
+        if not self.candidate_pool_size or num_allowed <= self.candidate_pool_size:
+            # Score the whole candidate set at once; only new or edited postings hit the model
+            if allowed is not None:
+                candidates = [candidates[i] for i in np.flatnonzero(allowed)]
+            return candidates, self.sbert_service.calculate_internship_similarities(student.skills, candidates)
+        
+        try:
+            # The index covers every candidate, so filters do not force a rebuild
+            embeddings = self.sbert_service.encode_internships(candidates)
+            index = self._get_vector_index(candidates, embeddings)
+            student_embedding = self.sbert_service.encode_skills(student.skills)
+            labels, scores = index.search(student_embedding, self.candidate_pool_size, allowed=allowed)
+            return [candidates[i] for i in labels], scores
+        except Exception as e:
+            logger.error(f"Candidate retrieval failed, scoring all internships: {e}")
+            if allowed is not None:
+                candidates = [candidates[i] for i in np.flatnonzero(allowed)]
+            return candidates, self.sbert_service.calculate_internship_similarities(student.skills, candidates)
+    
+    def filter_candidates(self, student: StudentProfile, internships: List[Internship]) -> FilterReport:
+        """Stage 0: eligibility mask over ``internships`` with per-predicate removal counts"""
+        report = self.eligibility_filter.apply(self.policy_scorer.compile_student(student), internships)
+        logger.debug(f"Eligibility pre-filter: {report.as_dict()}")
+        return report
     
     def get_recommendations(self, student: StudentProfile, internships: List[Internship], 
-                          top_k: int = 10) -> List[Recommendation]:
-        """Get top-k recommendations for a student"""
+                          top_k: Optional[int] = 10, within_state: bool = False) -> List[Recommendation]:
+        """Get top-k recommendations for a student
+        
+        ``within_state`` restricts the candidates to internships in the
+        student's own state (or remote ones).
+        """
+        
+        student_context = self.policy_scorer.compile_student(student)
+        
+        # Hard constraints first: ineligible internships never reach the models
+        report = self.filter_candidates(student_context, internships)
+        allowed = report.keep
+        if within_state:
+            student_state = student_context.state_key
+            allowed = allowed & np.array([
+                (bool(student_state) and LocationIndex.normalize(internship.state) == student_state)
+                or internship.internship_type == 'remote'
+                for internship in internships
+            ], dtype=bool)
+        
+        # Retrieve the semantic candidate pool; only it goes through full scoring
+        candidates, sbert_scores = self._retrieve_candidates(student, internships, allowed)
+        
+        # Policy scores for the whole pool in one vectorized pass
+        table = InternshipTable(candidates)
+        policy_scores, policy_components = self.policy_scorer.calculate_policy_scores(student_context, table)
         
-        # Calculate matches for all internships
-        recommendations = []
-        for internship in internships:
-            if internship.is_active:  # Only consider active internships
-                recommendation = self.calculate_match(student, internship)
-                recommendations.append(recommendation)
+        # LinUCB adaptive scores for every candidate arm in one batch
+        contexts = self.linucb_bandit.create_context_matrix(
+            student_context, table, sbert_scores, policy_scores, policy_components.get('location')
+        )
+        linucb_scores, confidences = self.linucb_bandit.score_batch(contexts, table.ids)
+        
+        final_scores = (
+            self.weights['sbert'] * np.asarray(sbert_scores, dtype=np.float64) +
+            self.weights['policy'] * policy_scores +
+            self.weights['linucb'] * linucb_scores
+        )
         
-        # Sort by final score (descending)
-        recommendations.sort(key=lambda x: x.match_score, reverse=True)
+        # Select the top-k without sorting the whole pool (ties keep catalogue order)
+        winners = top_k_indices(final_scores, top_k)
         
-        # Set ranks and return top-k
-        for i, rec in enumerate(recommendations[:top_k]):
-            rec.rank = i + 1
+        # Explanations and skill matches (one matrix multiply) for the winners only
+        skill_matches = self.sbert_service.match_skills(
+            student.skills, [candidates[i].skills_required for i in winners]
+        )
         
-        return recommendations[:top_k]
+        recommendations = [
+            self._build_recommendation(
+                student, candidates[i], float(sbert_scores[i]), float(policy_scores[i]),
+                float(linucb_scores[i]), float(confidences[i]), float(final_scores[i]), matches, rank=rank,
+                student_context=student_context
+            )
+            for rank, (i, matches) in enumerate(zip(winners, skill_matches), start=1)
+        ]
+        
+        # Remember the exact context each served recommendation was scored with
+        impression_ids = self.impression_store.record(student.id, [table.ids[i] for i in winners], contexts[winners])
+        for recommendation, impression_id in zip(recommendations, impression_ids):
+            recommendation.impression_id = impression_id
+        return recommendations
     
     def record_feedback(self, student_id: str, internship_id: str, 
                        student: StudentProfile, internship: Internship,
-                       applied: bool, approved: bool):
-        """Record student feedback for learning"""
+                       applied: bool, approved: bool, impression_id: Optional[str] = None):
+        """Record student feedback for learning
+        
+        With the ``impression_id`` of the served recommendation, the context
+        vector it was scored with is reused; otherwise (or once the impression
+        was evicted, or if it was served to another student or for another
+        internship) it is recomputed from the student and internship.
+        """
         
         # Calculate reward (1 if applied AND approved, 0 otherwise)
         reward = 1.0 if (applied and approved) else 0.0
         
-        # Calculate context vector
-        sbert_score = self.sbert_service.calculate_similarity(
-            student.skills, internship.skills_required, internship.description
-        )
-        policy_score, _ = self.policy_scorer.calculate_policy_score(student, internship)
+        impression = self.impression_store.get(impression_id) if impression_id else None
+        if impression is not None and (impression.internship_id != internship_id
+                                       or impression.student_id != student_id):
+            logger.warning(f"Impression {impression_id} was served to student {impression.student_id} for "
+                           f"internship {impression.internship_id}, not {student_id} for {internship_id}; "
+                           f"recomputing the context")
+            impression = None
         
-        context_vector = self.linucb_bandit._create_context_vector(
-            student, internship, sbert_score, policy_score
-        )
+        if impression is not None:
+            context_vector = impression.context_vector
+        else:
+            # Calculate context vector
+            sbert_score = self.sbert_service.calculate_similarity(
+                student.skills, internship.skills_required, internship.description
+            )
+            policy_score, _ = self.policy_scorer.calculate_policy_score(student, internship)
+            
+            context_vector = self.linucb_bandit._create_context_vector(
+                student, internship, sbert_score, policy_score
+            )
         
         # Update LinUCB bandit
         self.linucb_bandit.update_arm(student_id, internship_id, context_vector, reward)
@@ -689,5 +1336,5 @@ class AdvancedMatchmakingSystem:
         logger.info(f"Recorded feedback: student={student_id}, internship={internship_id}, "
                    f"applied={applied}, approved={approved}, reward={reward}")
 
-# Global instance
+# Global instance (cheap to create: the model and learning store load on first use)
 matchmaking_system = AdvancedMatchmakingSystem()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Per-Skill Embedding Vocabulary
+==============================
+
+Embeds every distinct (normalized) internship skill once and keeps all skill
+vectors in a single contiguous, L2-normalized float32 matrix. Matching a
+student's skills against any number of internship skills is then one gather
+plus one matrix multiply: each internship skill is paired with the student
+skill of maximum cosine similarity.
+
+Only catalogue skills are stored. Student skills come from request input, so
+they are embedded per request with ``embed`` and never added to the matrix.
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class SkillVocabulary:
+    """Growable matrix of skill embeddings indexed by normalized skill name"""
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], initial_capacity: int = 1024):
+        """``encode_fn`` embeds a batch of skill strings into a (n, dim) matrix"""
+        self._encode = encode_fn
+        self._initial_capacity = initial_capacity
+        self._rows: Dict[str, int] = {}
+        self._matrix: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(skill: str) -> str:
+        """Canonical form of a single skill"""
+        return skill.strip().lower() if skill else ""
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """All skill embeddings, one normalized row per skill"""
+        return self._matrix[:self._size]
+
+    def _embed_normalized(self, skills: List[str]) -> np.ndarray:
+        """L2-normalized embeddings of already-normalized skills"""
+        embeddings = np.asarray(self._encode(skills), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
+
+    def embed(self, skills: Iterable[str]) -> np.ndarray:
+        """Normalized embeddings of the given skills, one row each, without storing them"""
+        normalized = [self.normalize(skill) for skill in skills]
+        unique = list(dict.fromkeys(normalized))
+        embeddings = self._embed_normalized(unique)
+        positions = {skill: position for position, skill in enumerate(unique)}
+        return embeddings[[positions[skill] for skill in normalized]]
+
+    def _add(self, skills: List[str]):
+        """Embed new skills in one batch and append them to the matrix"""
+        embeddings = self._embed_normalized(skills)
+
+        with self._lock:
+            # Another thread may have added some of these in the meantime
+            new = [(skill, row) for skill, row in zip(skills, embeddings) if skill not in self._rows]
+            if not new:
+                return
+
+            needed = self._size + len(new)
+            if needed > self._matrix.shape[0] or self._matrix.shape[1] != embeddings.shape[1]:
+                capacity = max(self._initial_capacity, 2 * needed)
+                grown = np.zeros((capacity, embeddings.shape[1]), dtype=np.float32)
+                if self._size:
+                    grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+
+            for skill, row in new:
+                self._matrix[self._size] = row
+                self._rows[skill] = self._size
+                self._size += 1
+
+    def rows(self, skills: Iterable[str]) -> np.ndarray:
+        """Matrix rows for the given skills, embedding unseen ones first"""
+        normalized = [self.normalize(skill) for skill in skills]
+        missing = [skill for skill in dict.fromkeys(normalized) if skill and skill not in self._rows]
+        if missing:
+            self._add(missing)
+        return np.fromiter((self._rows[skill] for skill in normalized), dtype=np.int64, count=len(normalized))
+
+    def max_similarity(self, queries: np.ndarray, target_rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """For every target row, the best-matching query embedding (from ``embed``) and its cosine similarity"""
+        similarities = self._matrix[target_rows] @ queries.T  # (targets, queries)
+        best = similarities.argmax(axis=1)
+        return best, similarities[np.arange(len(target_rows)), best]
+
+    def __len__(self) -> int:
+        return self._size
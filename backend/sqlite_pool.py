@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+SQLite Connection Pool
+======================
+
+One long-lived connection per thread for a SQLite database, opened in WAL
+mode with tuned pragmas:
+
+- ``journal_mode=WAL``: readers never block on the writer (or vice versa);
+  only writers serialize
+- ``synchronous=NORMAL``: no fsync per commit in WAL mode; commits survive a
+  process crash, the last ones can be lost on power failure (pass
+  ``synchronous="FULL"`` to fsync every commit)
+- ``mmap_size``: reads served from a memory map instead of read() calls
+- ``busy_timeout``: writers wait for the lock instead of failing
+- a per-connection statement cache, so repeated queries are prepared once
+
+Connections are reused for the lifetime of their thread instead of being
+opened and closed around every statement.
+"""
+
+import logging
+import sqlite3
+import threading
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Thread-local SQLite connections sharing one configuration"""
+
+    def __init__(self, db_path: str, synchronous: str = "NORMAL", mmap_size: int = 256 * 1024 * 1024,
+                 busy_timeout_ms: int = 5000, cached_statements: int = 256):
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self.journal_mode = None
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close_all() can close it from another thread
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                                   cached_statements=self.cached_statements, check_same_thread=False)
+            self.journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close_all(self):
+        """Close every connection (threads reopen one on next use)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing SQLite connection: {e}")
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self._connections)
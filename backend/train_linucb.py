@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Offline LinUCB Training
+=======================
+
+Rebuilds every LinUCB arm from the interaction log instead of replaying the
+feedback one online update at a time:
+
+    A = I + Σ xxᵀ      b = Σ r·x      (per internship)
+
+The log is streamed in chunks (interaction_log.iter_interactions). Each chunk
+is grouped by internship with one stable argsort, and every group's Σ xxᵀ is
+a single matrix product. At the end all A⁻¹ are computed exactly in one
+stacked ``np.linalg.inv`` and θ = A⁻¹b with einsum.
+
+The new arms replace the stored ones atomically (bandit_store.replace_arm_table).
+Run the CLI while the API is stopped, since a running server would overwrite
+them with its in-memory arms; from inside the server use
+``LinUCBContextualBandit.retrain()``, which also swaps the arms in memory.
+
+Stored context vectors are used as recorded. With ``--context-dim`` they are
+zero-padded or truncated to a new dimension; features that were not recorded
+cannot be recovered from the log.
+
+Usage:
+    python train_linucb.py --db matchmaking_learning.db --chunk-size 200000
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from bandit_store import DEFAULT_DB_PATH, ArmParameters, create_arm_table, replace_arm_table
+from interaction_log import create_interaction_table, iter_interactions
+
+logger = logging.getLogger(__name__)
+
+
+def _fit_dim(contexts: np.ndarray, context_dim: int) -> np.ndarray:
+    """Zero-pad or truncate context vectors to ``context_dim`` columns"""
+    if contexts.shape[1] == context_dim:
+        return contexts
+    fitted = np.zeros((len(contexts), context_dim), dtype=contexts.dtype)
+    width = min(context_dim, contexts.shape[1])
+    fitted[:, :width] = contexts[:, :width]
+    return fitted
+
+
+def iter_training_chunks(db_path: str, chunk_size: int = 100000,
+                         until_id: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, int]]:
+    """(internship ids, contexts, rewards, id of the last row) per chunk of the log, up to ``until_id``"""
+    for batch in iter_interactions(db_path, chunk_size):
+        if until_id is not None and batch.ids[-1] > until_id:
+            keep = batch.ids <= until_id
+            if keep.any():
+                yield (batch.internship_ids[keep], batch.contexts[keep], batch.rewards[keep],
+                       int(batch.ids[keep][-1]))
+            return
+        yield batch.internship_ids, batch.contexts, batch.rewards, int(batch.ids[-1])
+
+
+def group_rows(internship_ids: np.ndarray) -> Iterator[Tuple[str, np.ndarray]]:
+    """(internship id, row positions) for every internship in a chunk, from one stable argsort"""
+    arm_ids, inverse = np.unique(internship_ids.astype(str), return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=len(arm_ids)))])
+    for group, arm_id in enumerate(arm_ids):
+        yield arm_id, order[bounds[group]:bounds[group + 1]]
+
+
+def accumulate(db_path: str, context_dim: int = 50, chunk_size: int = 100000,
+               until_id: Optional[int] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], int, int]:
+    """Per-internship Σ xxᵀ and Σ r·x over the interaction log
+
+    Returns (xxᵀ sums, r·x sums, number of interactions, id of the last one).
+    Only interactions with id <= ``until_id`` are used when it is given.
+    """
+    outer_sums: Dict[str, np.ndarray] = {}
+    reward_sums: Dict[str, np.ndarray] = {}
+    count = 0
+    last_id = 0
+    for internship_ids, contexts, rewards, last_id in iter_training_chunks(db_path, chunk_size, until_id):
+        X = _fit_dim(contexts, context_dim).astype(np.float64)
+        weighted = X * rewards.astype(np.float64)[:, None]
+
+        # One matrix product per internship in the chunk
+        for arm_id, rows in group_rows(internship_ids):
+            X_group = X[rows]
+            if arm_id in outer_sums:
+                outer_sums[arm_id] += X_group.T @ X_group
+                reward_sums[arm_id] += weighted[rows].sum(axis=0)
+            else:
+                outer_sums[arm_id] = X_group.T @ X_group
+                reward_sums[arm_id] = weighted[rows].sum(axis=0)
+        count += len(X)
+    return outer_sums, reward_sums, count, last_id
+
+
+def build_arms(outer_sums: Dict[str, np.ndarray], reward_sums: Dict[str, np.ndarray],
+               context_dim: int = 50) -> Dict[str, ArmParameters]:
+    """ArmParameters (A = I + Σ xxᵀ, exact A⁻¹ and θ) for every accumulated internship"""
+    arm_ids = list(outer_sums)
+    if not arm_ids:
+        return {}
+    A = np.stack([outer_sums[arm_id] for arm_id in arm_ids]) + np.eye(context_dim)
+    b = np.stack([reward_sums[arm_id] for arm_id in arm_ids])
+    try:
+        A_inv = np.linalg.inv(A)
+    except np.linalg.LinAlgError:
+        # A = I + Σ xxᵀ is positive definite, so this only happens with non-finite data
+        A_inv = np.stack([np.linalg.pinv(matrix) for matrix in A])
+    theta = np.einsum("mij,mj->mi", A_inv, b)
+    return {arm_id: ArmParameters(A[i], b[i], A_inv[i], theta[i]) for i, arm_id in enumerate(arm_ids)}
+
+
+def train(db_path: str, context_dim: int = 50, chunk_size: int = 100000,
+          until_id: Optional[int] = None) -> Tuple[Dict[str, ArmParameters], int, int]:
+    """Rebuild every arm from the log; returns (arms, interactions used, id of the last one)"""
+    outer_sums, reward_sums, count, last_id = accumulate(db_path, context_dim, chunk_size, until_id)
+    return build_arms(outer_sums, reward_sums, context_dim), count, last_id
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild LinUCB arms from the interactions table")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="learning database (default $MATCHMAKING_DB_PATH)")
+    parser.add_argument("--context-dim", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--dry-run", action="store_true", help="train but do not replace the stored arms")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        cursor = conn.cursor()
+        create_interaction_table(cursor)
+        create_arm_table(cursor)
+        conn.commit()
+
+        start = time.perf_counter()
+        arms, count, last_id = train(args.db, args.context_dim, args.chunk_size)
+        trained = time.perf_counter() - start
+        print(f"Trained {len(arms)} arms from {count} interactions in {trained:.2f}s")
+
+        if not args.dry_run:
+            start = time.perf_counter()
+            replace_arm_table(conn, arms, last_id)
+            print(f"Replaced stored arms in {time.perf_counter() - start:.2f}s (through interaction {last_id})")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
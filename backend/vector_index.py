@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Vector Index for Candidate Retrieval
+====================================
+
+Indexes precomputed internship embeddings so the matchmaking system can pull
+the few hundred most semantically similar postings for a student before the
+more expensive policy and LinUCB stages run.
+
+Two backends are provided:
+- ``NumpyVectorIndex``: exact cosine search with one matrix-vector product and
+  ``argpartition``; no extra dependencies.
+- ``HNSWVectorIndex``: approximate search with hnswlib (optional dependency),
+  worthwhile for catalogues of tens of thousands of postings.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+# hnswlib is optional; fall back to exact NumPy search without it
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    hnswlib = None
+    HNSWLIB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Below this size exact search is as fast as building/querying an HNSW graph
+HNSW_MIN_ITEMS = 5000
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows, leaving zero rows at zero"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Indices of the k highest scores, best first, in O(n + k log k)
+
+    Matches ``np.argsort(-scores, kind="stable")[:k]``: ties are broken by
+    position, NaN scores rank last and ``k=None`` ranks every score.
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    k = n if k is None else min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if np.isnan(scores).any():
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+    if k == n:
+        return np.argsort(-scores, kind="stable")
+
+    # Everything strictly above the k-th largest score, then the earliest ties with it
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    winners = np.concatenate([above, ties])
+    return winners[np.argsort(-scores[winners], kind="stable")]
+
+
+class NumpyVectorIndex:
+    """Exact cosine-similarity index backed by a normalized float32 matrix"""
+
+    def __init__(self):
+        self.matrix: Optional[np.ndarray] = None
+
+    def build(self, embeddings: np.ndarray):
+        """Index the given embeddings; row i gets label i"""
+        self.matrix = _normalize_rows(embeddings)
+
+    def search(self, query: np.ndarray, k: int,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (labels, cosine scores) of the top-k rows, best first"""
+        if self.matrix is None or len(self.matrix) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        query = _normalize_rows(np.asarray(query).reshape(1, -1))[0]
+        scores = self.matrix @ query
+        if allowed is not None:
+            scores = np.where(allowed, scores, -np.inf)
+            k = min(k, int(np.count_nonzero(allowed)))
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        labels = top_k_indices(scores, k)
+        return labels.astype(np.int64), scores[labels].astype(np.float32)
+
+    def __len__(self) -> int:
+        return 0 if self.matrix is None else len(self.matrix)
+
+
+class HNSWVectorIndex:
+    """Approximate cosine-similarity index backed by an hnswlib HNSW graph"""
+
+    def __init__(self, M: int = 16, ef_construction: int = 200, ef_search: int = 400):
+        if not HNSWLIB_AVAILABLE:
+            raise ImportError("hnswlib is not installed: pip install hnswlib")
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+        self.size = 0
+
+    def build(self, embeddings: np.ndarray):
+        """Index the given embeddings; row i gets label i"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.size, dim = embeddings.shape
+        self.index = hnswlib.Index(space="cosine", dim=dim)
+        self.index.init_index(max_elements=max(self.size, 1), ef_construction=self.ef_construction, M=self.M)
+        if self.size:
+            self.index.add_items(embeddings, np.arange(self.size))
+
+    def search(self, query: np.ndarray, k: int,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (labels, cosine scores) of the approximate top-k rows, best first"""
+        limit = self.size if allowed is None else int(np.count_nonzero(allowed))
+        k = min(k, limit)
+        if self.index is None or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        self.index.set_ef(max(self.ef_search, k))
+        filter_fn = (lambda label: bool(allowed[label])) if allowed is not None else None
+        labels, distances = self.index.knn_query(np.asarray(query, dtype=np.float32).reshape(1, -1),
+                                                 k=k, filter=filter_fn)
+        return labels[0].astype(np.int64), (1.0 - distances[0]).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def create_vector_index(backend: str = "auto", num_items: int = 0):
+    """Create a vector index: 'numpy', 'hnsw', or 'auto' (HNSW for large catalogues if installed)"""
+    if backend == "hnsw" or (backend == "auto" and HNSWLIB_AVAILABLE and num_items >= HNSW_MIN_ITEMS):
+        return HNSWVectorIndex()
+    if backend not in ("auto", "numpy", "hnsw"):
+        raise ValueError(f"Unknown vector index backend: {backend}")
+    return NumpyVectorIndex()
@@ -17,9 +17,11 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
 class RAGModel:
-    def __init__(self, json_path: str = "rag.json", persist_directory: str = "vector_db"):
+    def __init__(self, json_path: str = "rag.json", persist_directory: str = "vector_db", embeddings=None):
         self.json_path = json_path
         self.persist_directory = persist_directory
+        # Optional LangChain embeddings to reuse (e.g. a model already loaded in-process)
+        self.embeddings = embeddings
         self.llm = None
         self.vectorstore = None
         self.retriever = None
@@ -97,8 +99,8 @@ Internship Advice: {item.get('internship_advice', 'No advice available')}
         """Create ChromaDB vector store with embeddings"""
         print("🧠 Setting up vector store...")
         
-        # Use HuggingFace embeddings
-        embeddings = HuggingFaceEmbeddings(
+        # Use the provided embeddings, or load HuggingFace embeddings
+        embeddings = self.embeddings or HuggingFaceEmbeddings(
             model_name="all-MiniLM-L6-v2",
             model_kwargs={'device': 'cpu'}
         )
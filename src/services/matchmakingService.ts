@@ -61,12 +61,18 @@ export interface InternshipData {
   company_size: string;
 }
 
+export interface SkillMatch {
+  skill: string;
+  matched_skill: string;
+  score: number;
+}
+
 export interface MatchExplanation {
   sbert_score: number;
   policy_score: number;
   linucb_score: number;
   final_score: number;
-  skill_matches: string[];
+  skill_matches: SkillMatch[];
   location_match: string;
   equity_boost: string;
   cgpa_eligibility: boolean;
@@ -79,12 +85,14 @@ export interface Recommendation {
   match_score: number;
   rank: number;
   explanation: MatchExplanation;
+  impression_id?: string;
 }
 
 export interface MatchmakingRequest {
   student_profile: StudentProfileData;
   internships: InternshipData[];
   top_k?: number;
+  within_state?: boolean;
 }
 
 export interface FeedbackRequest {
@@ -94,6 +102,7 @@ export interface FeedbackRequest {
   internship: InternshipData;
   applied: boolean;
   approved: boolean;
+  impression_id?: string;
 }
 
 class MatchmakingService {
@@ -109,7 +118,8 @@ class MatchmakingService {
   async getRecommendations(
     studentProfile: StudentProfileData,
     internships: InternshipData[],
-    topK: number = 10
+    topK: number = 10,
+    withinState: boolean = false
   ): Promise<Recommendation[]> {
     try {
       const response = await fetch(`${this.baseUrl}/api/recommendations`, {
@@ -120,7 +130,8 @@ class MatchmakingService {
         body: JSON.stringify({
           student_profile: studentProfile,
           internships: internships,
-          top_k: topK
+          top_k: topK,
+          within_state: withinState
         })
       });
 
@@ -251,7 +262,7 @@ class MatchmakingService {
     
     // Add skill matches
     if (explanation.skill_matches.length > 0) {
-      reasons.push(`Skills: ${explanation.skill_matches.join(', ')}`);
+      reasons.push(`Skills: ${explanation.skill_matches.map(match => match.skill).join(', ')}`);
     } else {
       reasons.push('Skills: No direct matches');
     }
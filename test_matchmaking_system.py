@@ -10,6 +10,11 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
+import numpy as np
+from datetime import date
+
+from eligibility_filter import EligibilityFilter
+from embedding_store import EmbeddingStore
 from matchmaking_system import (
     AdvancedMatchmakingSystem,
     StudentProfile,
@@ -17,6 +22,17 @@ from matchmaking_system import (
     matchmaking_system
 )
 
+# Fixed "today" for eligibility checks, so fixture deadlines never expire
+TEST_TODAY = date(2024, 2, 1)
+
+def _make_system(directory, **overrides):
+    """Matchmaking system keeping its embeddings and learning database in ``directory``,
+    with an eligibility filter that uses TEST_TODAY"""
+    overrides.setdefault("eligibility_filter", EligibilityFilter(today=lambda: TEST_TODAY))
+    overrides.setdefault("embedding_store", EmbeddingStore(directory=os.path.join(directory, "embeddings")))
+    overrides.setdefault("db_path", os.path.join(directory, "learning.db"))
+    return AdvancedMatchmakingSystem(**overrides)
+
 def test_matchmaking_system():
     """Test the complete matchmaking system"""
     print("🧪 Testing AI-Powered Matchmaking System")
@@ -152,8 +168,11 @@ def test_matchmaking_system():
     
     # Test the matchmaking system
     print("🤖 Running AI-Powered Matchmaking...")
+    import tempfile
+    directory = tempfile.TemporaryDirectory()
     try:
-        recommendations = matchmaking_system.get_recommendations(student, internships, top_k=3)
+        system = _make_system(directory.name)
+        recommendations = system.get_recommendations(student, internships, top_k=3)
         
         print(f"✅ Generated {len(recommendations)} recommendations")
         print()
@@ -170,7 +189,7 @@ def test_matchmaking_system():
             print(f"      Policy Score: {rec.explanation.policy_score:.3f}")
             print(f"      LinUCB Score: {rec.explanation.linucb_score:.3f}")
             print(f"      Final Score: {rec.explanation.final_score:.3f}")
-            print(f"      Skill Matches: {', '.join(rec.explanation.skill_matches)}")
+            print(f"      Skill Matches: {', '.join(f'{m.skill} ({m.score:.2f})' for m in rec.explanation.skill_matches)}")
             print(f"      Location Match: {rec.explanation.location_match}")
             print(f"      Equity Boost: {rec.explanation.equity_boost}")
             print(f"      CGPA Eligible: {rec.explanation.cgpa_eligibility}")
@@ -180,7 +199,7 @@ def test_matchmaking_system():
         
         # Test feedback recording
         print("📝 Testing feedback recording...")
-        matchmaking_system.record_feedback(
+        system.record_feedback(
             student_id=student.id,
             internship_id=recommendations[0].internship.id,
             student=student,
@@ -190,6 +209,7 @@ def test_matchmaking_system():
         )
         print("✅ Feedback recorded successfully")
         
+        system.shutdown()
         print("\n🎉 All tests passed! The AI-powered matchmaking system is working correctly.")
         
     except Exception as e:
@@ -197,9 +217,983 @@ def test_matchmaking_system():
         import traceback
         traceback.print_exc()
         return False
+    finally:
+        directory.cleanup()
     
     return True
 
+def test_batched_similarity_matches_pairwise():
+    """Batched SBERT scoring must agree with the per-pair API"""
+    print("🧪 Testing batched SBERT similarity")
+    
+    service = matchmaking_system.sbert_service
+    student_skills = ["Python", "Machine Learning", "SQL"]
+    internship_data = [
+        (["Python", "TensorFlow"], "Build ML models"),
+        (["JavaScript", "React"], "Build web applications"),
+        (["Excel"], ""),
+    ]
+    
+    batched = service.calculate_similarities(
+        student_skills,
+        [service.build_internship_text(skills, description) for skills, description in internship_data]
+    )
+    assert batched.shape == (len(internship_data),)
+    
+    for score, (skills, description) in zip(batched, internship_data):
+        pairwise = service.calculate_similarity(student_skills, skills, description)
+        assert abs(float(score) - pairwise) < 1e-5
+    
+    # A student without skills gets a zero vector of the model's dimension and scores 0 rather than NaN
+    assert service.encode_skills([]).shape == (1, service.dimension)
+    empty = service.calculate_similarities([], ["Python developer"])
+    assert float(empty[0]) == 0.0
+    
+    print("✅ Batched similarity matches per-pair similarity")
+
+def test_skill_embedding_cache():
+    """Equivalent skill sets should be served from the LRU cache"""
+    print("🧪 Testing skill embedding cache")
+    
+    service = matchmaking_system.sbert_service
+    first = service.encode_skills(["Python", "Data Analysis"])
+    hits_before = service.skill_cache.cache_info().hits
+    
+    # Same skills, different order, casing and duplicates
+    second = service.encode_skills(["data analysis ", "python", "Python"])
+    
+    assert second is first
+    assert service.skill_cache.cache_info().hits == hits_before + 1
+    
+    # Only the cache key is normalized: the model sees the skills as given
+    model = service.model
+    seen = []
+    encode = model.encode
+    model.encode = lambda texts, **kwargs: seen.extend(texts) or encode(texts, **kwargs)
+    try:
+        service.encode_skills(["Zeta Analytics", "alpha testing"])
+    finally:
+        del model.encode
+    assert seen == ["Zeta Analytics alpha testing"]
+    
+    print(f"✅ Skill cache stats: {service.skill_cache.cache_info()}")
+
+def test_shared_embedding_store():
+    """Two stores on one directory (as in two worker processes) never overwrite each other's rows"""
+    print("🧪 Testing shared embedding store")
+    
+    import tempfile
+    from embedding_store import EmbeddingStore
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store")
+        first = EmbeddingStore(directory=path, model_name="test-model")
+        second = EmbeddingStore(directory=path, model_name="test-model")
+        assert not os.path.exists(path)  # Created on the first write only
+        
+        encoded = []
+        def encode(texts):
+            encoded.extend(texts)
+            return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+        
+        first.get_or_encode(["a"], ["x"], encode)
+        # The second store has never seen "a": it must append after it, not over it
+        second.get_or_encode(["b"], ["yy"], encode)
+        assert encoded == ["x", "yy"]
+        
+        # Each picks up the other's rows instead of re-encoding them
+        assert np.array_equal(first.get_or_encode(["a", "b"], ["x", "yy"], encode), [[1, 1], [2, 1]])
+        assert np.array_equal(second.get_or_encode(["b", "a"], ["yy", "x"], encode), [[2, 1], [1, 1]])
+        assert encoded == ["x", "yy"]
+        
+        reopened = EmbeddingStore(directory=path, model_name="test-model")
+        assert reopened.rows == 2 and len(reopened) == 2
+        assert np.array_equal(reopened.lookup("a", "x"), [1, 1])
+    
+    print("✅ Embedding store is safe to share between processes")
+
+def test_skill_matching():
+    """Skill matching pairs each required skill with its closest student skill"""
+    print("🧪 Testing max-similarity skill matching")
+    
+    service = matchmaking_system.sbert_service
+    matches = service.match_skills(
+        ["React", "python"],
+        [["Python", "R"], [], ["react"]]
+    )
+    
+    assert len(matches) == 3
+    assert [m.skill for m in matches[0]] == ["Python"]  # "R" must not match "React"
+    assert matches[0][0].matched_skill == "python"
+    assert abs(matches[0][0].score - 1.0) < 1e-4
+    assert matches[1] == []
+    assert [m.matched_skill for m in matches[2]] == ["React"]
+    
+    # Only internship skills are kept; request-supplied student skills never grow the vocabulary
+    size = len(service.skill_vocabulary)
+    service.match_skills(["Cobol", "Fortran 77", "cobol"], [["Python"]])
+    assert len(service.skill_vocabulary) == size
+    
+    print(f"✅ Skill matches: {matches}")
+
+def test_vector_index_retrieval():
+    """The NumPy index must return the exact top-k by cosine similarity"""
+    print("🧪 Testing candidate retrieval index")
+    
+    from vector_index import NumpyVectorIndex
+    
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(500, 32))
+    query = rng.normal(size=32)
+    
+    index = NumpyVectorIndex()
+    index.build(embeddings)
+    labels, scores = index.search(query, 20)
+    
+    cosine = (embeddings @ query) / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query))
+    assert list(labels) == list(np.argsort(-cosine)[:20])
+    assert np.allclose(scores, cosine[labels], atol=1e-5)
+    
+    # Only allowed rows can be retrieved
+    allowed = np.zeros(500, dtype=bool)
+    allowed[::50] = True
+    labels, _ = index.search(query, 20, allowed=allowed)
+    assert sorted(labels) == list(range(0, 500, 50))
+    
+    print("✅ Retrieval index returns the exact top-k")
+
+def _make_student(**overrides):
+    """Student profile with sensible defaults for focused tests"""
+    fields = dict(
+        id="test-student-2", full_name="Asha Verma", email="asha@example.com", phone="+911234567890",
+        date_of_birth="2002-05-01", state="Maharashtra", district="Pune", city="Pune", pincode="411001",
+        current_education="Bachelor's Degree", university="Pune University", course="Computer Science",
+        graduation_year="2025", cgpa="8.0", social_category="Other Backward Classes (OBC)",
+        family_income="₹1,00,000 - ₹2,00,000", participation_type="first-time",
+        skills=["Python", "SQL"], preferred_locations=["Mumbai"], stipend_expectation="₹8,000 - ₹12,000",
+        available_duration="3 months", additional_info=""
+    )
+    fields.update(overrides)
+    return StudentProfile(**fields)
+
+def _make_internship(internship_id, **overrides):
+    """Internship with sensible defaults for focused tests"""
+    fields = dict(
+        id=internship_id, title="Intern", company="Acme", description="General internship",
+        skills_required=["Python"], cgpa_requirement=7.0, location="Pune, MH", state="Maharashtra",
+        district="Pune", city="Pune", internship_type="on-site", duration_weeks=12, stipend_amount=10000,
+        stipend_currency="INR", application_deadline="2024-03-01", start_date="2024-04-01",
+        end_date="2024-07-01", available_positions=2, filled_positions=0, benefits=[],
+        application_process="Interview", is_active=True, tags=[], department="Engineering",
+        category="tech", company_size="startup"
+    )
+    fields.update(overrides)
+    return Internship(**fields)
+
+def test_vectorized_policy_scoring():
+    """Policy scores computed over an internship table must equal the per-pair scores"""
+    print("🧪 Testing vectorized policy scoring")
+    
+    from internship_table import InternshipTable
+    
+    policy = matchmaking_system.policy_scorer
+    students = [
+        _make_student(),
+        _make_student(cgpa="", family_income="unknown", stipend_expectation="", available_duration="",
+                      preferred_locations=[], participation_type="returning"),
+        _make_student(cgpa="9.2", social_category="Minority", family_income="₹12,00,000",
+                      stipend_expectation="15000", available_duration="10 weeks"),
+    ]
+    internships = [
+        _make_internship("p-1"),
+        _make_internship("p-2", cgpa_requirement=None, stipend_amount=None, duration_weeks=0,
+                         internship_type="remote", location="Mumbai, MH", city="Mumbai"),
+        _make_internship("p-3", cgpa_requirement=8.5, stipend_amount=5000, duration_weeks=26,
+                         internship_type="hybrid", state="Karnataka", district="Bangalore", city="Bangalore"),
+        # Malformed durations score neutral instead of failing the request
+        _make_internship("p-4", duration_weeks=None),
+        _make_internship("p-5", duration_weeks="twelve"),
+        _make_internship("p-6", duration_weeks=float("nan")),
+    ]
+    table = InternshipTable(internships)
+    assert list(policy.calculate_policy_scores(students[0], table)[1]['available_duration'][3:]) == [0.5, 0.5, 0.5]
+    
+    for student in students:
+        totals, components = policy.calculate_policy_scores(student, table)
+        for position, internship in enumerate(internships):
+            score, details = policy.calculate_policy_score(student, internship)
+            assert abs(totals[position] - score) < 1e-12
+            for name, value in details['scores'].items():
+                assert abs(components[name][position] - value) < 1e-12, name
+    
+    print("✅ Vectorized policy scores match per-pair scores")
+
+def test_compiled_student_context():
+    """Student fields are parsed once into a context; malformed values fall back to neutral scores"""
+    print("🧪 Testing compiled student context")
+    
+    policy = matchmaking_system.policy_scorer
+    context = policy.compile_student(_make_student(
+        family_income="₹2,00,000 - ₹5,00,000", stipend_expectation="₹8,000 - ₹12,000",
+        available_duration="3 months", cgpa="8.0"
+    ))
+    assert context.income == 350000 and context.income_score == 0.8
+    assert context.stipend_expectation == 10000
+    assert abs(context.available_weeks - 3 * 4.33) < 1e-9
+    assert context.cgpa == 8.0
+    assert policy.compile_student(context) is context
+    
+    malformed = policy.compile_student(_make_student(
+        family_income="about 3 lakhs", stipend_expectation="negotiable", available_duration="flexible", cgpa="N/A"
+    ))
+    assert malformed.income is None and malformed.stipend_expectation is None
+    assert malformed.available_weeks is None and malformed.cgpa is None
+    
+    internship = _make_internship("c-1")
+    _, details = policy.calculate_policy_score(malformed, internship)
+    for name in ('family_income', 'stipend_expectation', 'available_duration', 'cgpa_eligibility'):
+        assert details['scores'][name] == 0.5, name
+    
+    print("✅ Student context parsed once with safe fallbacks")
+
+def test_policy_factor_registry():
+    """Student-only factors are scored once per request; pair factors once per internship"""
+    print("🧪 Testing policy factor registry")
+    
+    from internship_table import InternshipTable
+    from matchmaking_system import PolicyAwareScoring, STUDENT, INTERNSHIP
+    
+    policy = PolicyAwareScoring()
+    assert policy.factors['social_category'].student_only
+    assert not policy.factors['location'].student_only
+    
+    calls = {'student': 0, 'pair': 0}
+    
+    def first_generation_score(context):
+        calls['student'] += 1
+        return 1.0, "First-generation learner"
+    
+    def remote_score(context, internship):
+        calls['pair'] += 1
+        return (1.0 if internship.internship_type == 'remote' else 0.0), "Remote preference"
+    
+    for name in policy.weights:
+        policy.weights[name] *= 0.9
+    policy.register_factor('first_generation', 0.05, frozenset({STUDENT}), first_generation_score)
+    policy.register_factor('remote_preference', 0.05, frozenset({STUDENT, INTERNSHIP}), remote_score)
+    
+    internships = [_make_internship(f"f-{i}", internship_type=t) for i, t in enumerate(["remote", "on-site", "hybrid"])]
+    context = policy.compile_student(_make_student())
+    totals, components = policy.calculate_policy_scores(context, InternshipTable(internships))
+    assert calls == {'student': 1, 'pair': 3}  # Pair factor without score_batch falls back to per-internship calls
+    assert list(components['remote_preference']) == [1.0, 0.0, 0.0]
+    
+    for position, internship in enumerate(internships):
+        score, details = policy.calculate_policy_score(context, internship)
+        assert abs(totals[position] - score) < 1e-12
+        assert details['explanations']['first_generation'] == "First-generation learner"
+    assert calls['student'] == 1
+    
+    print("✅ Student-only factors hoisted out of the per-internship loop")
+
+def test_location_index():
+    """Location scoring uses interned ids and supports a within-state filter"""
+    print("🧪 Testing location index")
+    
+    import tempfile
+    from internship_table import InternshipTable
+    
+    policy = matchmaking_system.policy_scorer
+    student = _make_student(state="Maharashtra", district="Pune", city="Pune", preferred_locations=["Bangalore"])
+    internships = [
+        _make_internship("l-1", state="maharashtra", district="pune ", city="PUNE"),
+        _make_internship("l-2", state="Maharashtra", district="Mumbai", city="Mumbai"),
+        _make_internship("l-3", state="Karnataka", district="Bangalore Urban", city="Bangalore",
+                         location="Bangalore, Karnataka"),
+        _make_internship("l-4", state="Delhi", district="New Delhi", city="New Delhi", location="New Delhi",
+                         internship_type="remote"),
+        _make_internship("l-5", state="Delhi", district="New Delhi", city="New Delhi", location="New Delhi"),
+    ]
+    
+    context = policy.compile_student(student)
+    scores = policy._location_scores(context, InternshipTable(internships))
+    assert list(scores) == [1.0, 0.6, 0.4, 0.3, 0.1]
+    for position, internship in enumerate(internships):
+        assert policy.calculate_location_score(context, internship)[0] == scores[position]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        system = _make_system(directory)
+        recommendations = system.get_recommendations(student, internships, top_k=5, within_state=True)
+        assert sorted(rec.internship.id for rec in recommendations) == ["l-1", "l-2", "l-4"]
+        
+        # Blank names never match each other; a student without a state only keeps remote postings
+        blank = _make_student(state="", district="", city=" ", preferred_locations=["", "Nowhere"])
+        unplaced = [_make_internship("b-1", state="", district="", city=""),
+                    _make_internship("b-2", state="", district="", city="", internship_type="remote")]
+        table = InternshipTable(unplaced)
+        blank_context = policy.compile_student(blank)
+        assert list(policy._location_scores(blank_context, table)) == [0.1, 0.3]
+        assert [policy.calculate_location_score(blank_context, i)[0] for i in unplaced] == [0.1, 0.3]
+        recommendations = system.get_recommendations(blank, internships + unplaced, top_k=7, within_state=True)
+        assert sorted(rec.internship.id for rec in recommendations) == ["b-2", "l-4"]
+        system.shutdown()
+    
+    # Student names are only looked up: scoring never grows a table's vocabulary
+    table = InternshipTable(internships)
+    size = len(table.locations)
+    policy._location_scores(policy.compile_student(_make_student(city="Atlantis", preferred_locations=["Mars"])), table)
+    assert len(table.locations) == size
+    
+    print("✅ Location ids match case-insensitively and filter by state")
+
+def test_eligibility_prefilter():
+    """Ineligible internships are dropped before scoring, with per-predicate counts"""
+    print("🧪 Testing eligibility pre-filter")
+    
+    internships = [
+        _make_internship("e-1"),
+        _make_internship("e-2", is_active=False),
+        _make_internship("e-3", application_deadline="2024-01-31T23:59:00Z"),
+        _make_internship("e-4", available_positions=2, filled_positions=2),
+        _make_internship("e-5", cgpa_requirement=9.5),
+        _make_internship("e-6", is_active=False, filled_positions=5),  # Counted once, by the first predicate
+        _make_internship("e-7", application_deadline="", cgpa_requirement=None),
+    ]
+    student = _make_student(cgpa="8.0")
+    
+    eligibility = EligibilityFilter(today=lambda: TEST_TODAY)
+    report = eligibility.apply(matchmaking_system.policy_scorer.compile_student(student), internships)
+    assert report.removed == {'active': 2, 'deadline': 1, 'positions': 1, 'cgpa': 1}
+    assert [i.id for i, keep in zip(internships, report.keep) if keep] == ["e-1", "e-7"]
+    assert eligibility.stats()['removed']['active'] == 2
+    
+    # Predicates can be disabled
+    lenient = EligibilityFilter(predicates=["active"], today=lambda: TEST_TODAY)
+    assert lenient.apply(matchmaking_system.policy_scorer.compile_student(student), internships).remaining == 5
+    
+    print(f"✅ Pre-filter report: {report.as_dict()}")
+
+def test_top_k_selection():
+    """Partial top-k selection must agree with a stable full sort, including ties"""
+    print("🧪 Testing top-k selection")
+    
+    from vector_index import top_k_indices
+    
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        scores = rng.integers(0, 6, size=int(rng.integers(1, 80))).astype(float)
+        k = int(rng.integers(1, 90))
+        assert list(top_k_indices(scores, k)) == list(np.argsort(-scores, kind='stable')[:k])
+    assert list(top_k_indices(np.array([0.2, np.nan, 0.9]), 3)) == [2, 0, 1]
+    assert list(top_k_indices(np.array([0.2, 0.5, 0.9]), None)) == [2, 1, 0]
+    
+    # top_k=None (allowed by the API) returns every eligible internship
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        system = _make_system(directory)
+        internships = [_make_internship(f"k-{i}") for i in range(4)]
+        recommendations = system.get_recommendations(_make_student(), internships, top_k=None)
+        assert sorted(rec.internship.id for rec in recommendations) == [f"k-{i}" for i in range(4)]
+        assert [rec.rank for rec in recommendations] == [1, 2, 3, 4]
+        system.shutdown()
+    
+    print("✅ Top-k selection matches a full stable sort")
+
+def test_sherman_morrison_updates():
+    """Incrementally maintained A⁻¹ and θ must match an exact inversion"""
+    print("🧪 Testing Sherman–Morrison arm updates")
+    
+    from matchmaking_system import ArmParameters
+    
+    rng = np.random.default_rng(2)
+    arm = ArmParameters.initial(20)
+    A, b = np.eye(20), np.zeros(20)
+    for _ in range(150):
+        x = rng.random(20) * rng.choice([1.0, 100.0])
+        reward = float(rng.random() < 0.3)
+        arm.update(x, reward, reinversion_interval=0)
+        A += np.outer(x, x)
+        b += reward * x
+    
+    assert np.allclose(arm.A_inv, np.linalg.inv(A), atol=1e-8)
+    assert np.allclose(arm.theta, np.linalg.inv(A) @ b, atol=1e-8)
+    assert arm.updates_since_inversion == 150
+    
+    # Periodic exact re-inversion resets the drift counter
+    arm.update(rng.random(20), 1.0, reinversion_interval=151)
+    assert arm.updates_since_inversion == 0
+    
+    print("✅ Incremental inverse matches exact inversion")
+
+def test_binary_arm_storage():
+    """Arm parameters round-trip through BLOBs and JSON rows are migrated"""
+    print("🧪 Testing binary arm storage")
+    
+    import json
+    import sqlite3
+    import tempfile
+    from bandit_store import create_arm_table, decode_array, encode_array
+    from matchmaking_system import LinUCBContextualBandit
+    
+    matrix = np.arange(12, dtype=np.float64).reshape(3, 4) / 7
+    decoded = decode_array(encode_array(matrix))
+    assert decoded.shape == (3, 4) and np.array_equal(decoded, matrix)
+    assert not decoded.flags.writeable  # Zero-copy view over the blob
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "legacy.db")
+        A = np.eye(50) * 2
+        b = np.full(50, 0.5)
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE arm_parameters (internship_id TEXT PRIMARY KEY, A_matrix TEXT, b_vector TEXT, "
+                     "last_updated DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO arm_parameters (internship_id, A_matrix, b_vector) VALUES (?, ?, ?)",
+                     ("legacy-arm", json.dumps(A.tolist()), json.dumps(b.tolist())))
+        conn.commit()
+        conn.close()
+        
+        bandit = LinUCBContextualBandit(db_path=db_path)
+        arm = bandit._get_arm_parameters("legacy-arm")
+        assert np.array_equal(arm.A, A) and np.allclose(arm.theta, b / 2)
+        
+        bandit.update_arm("student", "legacy-arm", np.ones(50, dtype=np.float32), 1.0)
+        assert bandit._get_arm_parameters("legacy-arm").updates_since_inversion == 1
+        
+        bandit.close()
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT typeof(A_matrix) FROM arm_parameters").fetchone()[0] == "blob"
+        conn.close()
+        
+        # A migration that fails part-way leaves the JSON table exactly as it was
+        db_path = os.path.join(directory, "interrupted.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE arm_parameters (internship_id TEXT PRIMARY KEY, A_matrix TEXT, b_vector TEXT, "
+                     "last_updated DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO arm_parameters (internship_id, A_matrix, b_vector) VALUES (?, ?, ?)",
+                         [("good-arm", json.dumps(A.tolist()), json.dumps(b.tolist())),
+                          ("torn-arm", "[[1.0, 0.0", json.dumps(b.tolist()))])
+        conn.commit()
+        try:
+            create_arm_table(conn.cursor())
+            assert False, "a malformed JSON arm must abort the migration"
+        except ValueError:
+            pass
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "arm_parameters_json" not in tables
+        assert conn.execute("SELECT COUNT(*) FROM arm_parameters WHERE typeof(A_matrix) = 'text'").fetchone()[0] == 2
+        conn.close()
+        
+        # JSON arms orphaned next to a binary table by an older interrupted migration are recovered
+        db_path = os.path.join(directory, "orphaned.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE arm_parameters_json (internship_id TEXT PRIMARY KEY, A_matrix TEXT, "
+                     "b_vector TEXT, last_updated DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO arm_parameters_json (internship_id, A_matrix, b_vector) VALUES (?, ?, ?)",
+                     ("orphaned-arm", json.dumps(A.tolist()), json.dumps(b.tolist())))
+        conn.commit()
+        create_arm_table(conn.cursor())
+        conn.commit()
+        conn.close()
+        bandit = LinUCBContextualBandit(db_path=db_path)
+        assert np.array_equal(bandit._get_arm_parameters("orphaned-arm").A, A)
+        bandit.close()
+    
+    print("✅ Arms stored as binary BLOBs")
+
+def test_write_behind_arm_store():
+    """Arms are served from memory, flushed in batches and rebuilt from interactions after a crash"""
+    print("🧪 Testing write-behind arm store")
+    
+    import sqlite3
+    import tempfile
+    from matchmaking_system import LinUCBContextualBandit
+    
+    rng = np.random.default_rng(5)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "learning.db")
+        bandit = LinUCBContextualBandit(db_path=db_path, flush_interval=0)  # No timer: flush only when asked
+        for i in range(20):
+            bandit.update_arm("student", f"arm-{i % 3}", rng.random(50).astype(np.float32), float(i % 2))
+        
+        # Updates are visible immediately but not yet written
+        assert bandit._get_arm_parameters("arm-0").updates_since_inversion == 7
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM arm_parameters").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0] == 20
+        conn.close()
+        
+        assert bandit.flush() == 3
+        assert bandit.flush() == 0  # Nothing dirty
+        
+        # More feedback after the flush, then a "crash" (no flush): a new bandit replays it
+        for i in range(5):
+            bandit.update_arm("student", "arm-1", rng.random(50).astype(np.float32), 1.0)
+        restarted = LinUCBContextualBandit(db_path=db_path, flush_interval=0)
+        for arm_id in ("arm-0", "arm-1", "arm-2"):
+            before = bandit._get_arm_parameters(arm_id)
+            after = restarted._get_arm_parameters(arm_id)
+            assert np.allclose(before.A, after.A) and np.allclose(before.theta, after.theta)
+            assert before.updates_since_inversion == after.updates_since_inversion
+        bandit.close()
+        restarted.close()
+        
+        # A database from before write-behind has no watermark, but its stored arms
+        # already include every logged interaction: nothing may be replayed
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM bandit_metadata")
+        conn.commit()
+        conn.close()
+        legacy = LinUCBContextualBandit(db_path=db_path, flush_interval=0)
+        for arm_id in ("arm-0", "arm-1", "arm-2"):
+            assert np.allclose(legacy._get_arm_parameters(arm_id).A, bandit._get_arm_parameters(arm_id).A)
+        legacy.close()
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT value FROM bandit_metadata").fetchone()[0] == 25
+        conn.close()
+    
+    print("✅ Write-behind arm store is crash safe")
+
+def test_batch_linucb_scoring():
+    """score_batch matches per-pair select_arm for trained and unseen arms"""
+    print("🧪 Testing batch LinUCB scoring")
+    
+    import tempfile
+    from matchmaking_system import LinUCBContextualBandit
+    
+    rng = np.random.default_rng(11)
+    with tempfile.TemporaryDirectory() as directory:
+        bandit = LinUCBContextualBandit(db_path=os.path.join(directory, "learning.db"), alpha=0.7, flush_interval=0)
+        for i in range(30):
+            bandit.update_arm("student", f"arm-{i % 4}", rng.random(50).astype(np.float32), float(i % 3 == 0))
+        
+        arm_ids = ["arm-0", "new-arm", "arm-3", "arm-0", "arm-1", "other-new-arm"]
+        contexts = rng.random((len(arm_ids), 50)).astype(np.float32)
+        scores, confidences = bandit.score_batch(contexts, arm_ids)
+        assert scores.shape == confidences.shape == (len(arm_ids),)
+        
+        for i, arm_id in enumerate(arm_ids):
+            arm = bandit._get_arm_parameters(arm_id)
+            x = contexts[i]
+            expected_confidence = 0.7 * np.sqrt(max(float(x @ arm.A_inv @ x), 0.0))
+            assert abs(confidences[i] - expected_confidence) < 1e-9
+            assert abs(scores[i] - (arm.theta @ x + expected_confidence)) < 1e-9
+        
+        # Unseen arms get the prior: no expected reward, only exploration
+        assert abs(scores[1] - 0.7 * np.linalg.norm(contexts[1].astype(np.float64))) < 1e-9
+        assert bandit.score_batch(np.zeros((0, 50)), [])[0].shape == (0,)
+        bandit.close()
+    
+    print("✅ Batch scores match per-arm LinUCB")
+
+def test_context_matrix():
+    """The batched context matrix matches the per-pair context vector"""
+    print("🧪 Testing vectorized LinUCB context features")
+    
+    from internship_table import InternshipTable
+    
+    bandit = matchmaking_system.linucb_bandit
+    policy = matchmaking_system.policy_scorer
+    student = _make_student()
+    internships = [
+        _make_internship("same-city"),
+        _make_internship("same-district", city="Hinjewadi"),
+        _make_internship("same-state", district="Mumbai", city="Mumbai", internship_type="hybrid"),
+        _make_internship("elsewhere", state="Karnataka", district="Bangalore Urban", city="Bangalore",
+                         internship_type="remote", cgpa_requirement=None, stipend_amount=None, duration_weeks=0),
+        _make_internship("case", state="maharashtra ", district="PUNE", city="pune"),
+    ]
+    table = InternshipTable(internships)
+    context = policy.compile_student(student)
+    sbert_scores = np.linspace(0.1, 0.9, len(internships))
+    policy_scores, components = policy.calculate_policy_scores(context, table)
+    
+    matrix = bandit.create_context_matrix(context, table, sbert_scores, policy_scores)
+    assert matrix.shape == (len(internships), bandit.context_dim) and matrix.dtype == np.float32
+    assert np.array_equal(matrix[:, 14], np.float32([1.0, 0.8, 0.6, 0.0, 1.0]))
+    assert np.array_equal(matrix[3, 6:12], [0, 1, 0, 0, 1, 0])
+    assert not matrix[:, bandit.NUM_CONTEXT_FEATURES:].any()  # Zero padding
+    
+    # Reusing the policy location component gives the same features
+    reused = bandit.create_context_matrix(context, table, sbert_scores, policy_scores, components['location'])
+    assert np.array_equal(matrix, reused)
+    
+    for i, internship in enumerate(internships):
+        vector = bandit._create_context_vector(student, internship, float(sbert_scores[i]), float(policy_scores[i]))
+        assert np.array_equal(vector, matrix[i])
+    
+    print("✅ Context matrix matches per-pair vectors")
+
+def test_impression_feedback():
+    """Feedback quoting an impression id reuses the served context vector"""
+    print("🧪 Testing impression-based feedback")
+    
+    import tempfile
+    from impression_store import ImpressionStore
+    
+    store = ImpressionStore(maxsize=2)
+    ids = store.record("s", ["a", "b", "c"], np.ones((3, 50)))
+    assert len(set(ids)) == 3 and len(store) == 2
+    assert store.get(ids[0]) is None and store.get(ids[2]).internship_id == "c"
+    
+    with tempfile.TemporaryDirectory() as directory:
+        system = _make_system(directory)
+        system.linucb_bandit.flush_interval = 0
+        student = _make_student()
+        internships = [_make_internship(f"impression-{i}", stipend_amount=5000 * (i + 1)) for i in range(4)]
+        recommendations = system.get_recommendations(student, internships, top_k=2)
+        assert all(rec.impression_id for rec in recommendations)
+        
+        served = recommendations[0]
+        impression = system.impression_store.get(served.impression_id)
+        assert impression.internship_id == served.internship.id and impression.student_id == student.id
+        
+        # The models must not run again for feedback with a known impression
+        calls = []
+        original = system.sbert_service.calculate_similarity
+        system.sbert_service.calculate_similarity = lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs)
+        system.record_feedback(student.id, served.internship.id, student, served.internship, True, True,
+                               impression_id=served.impression_id)
+        assert not calls
+        arm = system.linucb_bandit._get_arm_parameters(served.internship.id)
+        x = impression.context_vector.astype(np.float64)
+        assert np.allclose(arm.b, x) and np.allclose(arm.A, np.eye(50) + np.outer(x, x))
+        
+        # Unknown (e.g. evicted) impressions fall back to recomputing the context
+        system.record_feedback(student.id, served.internship.id, student, served.internship, True, False,
+                               impression_id="unknown")
+        assert len(calls) == 1
+        
+        # Another student quoting this impression must not train on its context
+        other = _make_student(id="other-student", cgpa="6.5", skills=["Marketing"])
+        A_before = system.linucb_bandit._get_arm_parameters(served.internship.id).A.copy()
+        system.record_feedback(other.id, served.internship.id, other, served.internship, True, True,
+                               impression_id=served.impression_id)
+        assert len(calls) == 2
+        x_other = system.linucb_bandit._create_context_vector(
+            other, served.internship,
+            original(other.skills, served.internship.skills_required, served.internship.description),
+            system.policy_scorer.calculate_policy_score(other, served.internship)[0]
+        ).astype(np.float32).astype(np.float64)
+        assert not np.allclose(x_other, x)
+        arm = system.linucb_bandit._get_arm_parameters(served.internship.id)
+        assert np.allclose(arm.A - A_before, np.outer(x_other, x_other))
+        system.shutdown()
+    
+    print("✅ Feedback reuses served context vectors")
+
+def test_interaction_log():
+    """Concurrent appends are group-committed as binary rows that stream, compact and export"""
+    print("🧪 Testing interaction log")
+    
+    import json
+    import sqlite3
+    import tempfile
+    import threading
+    from interaction_log import InteractionLog, compact, create_interaction_table, export, iter_interactions
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "learning.db")
+        conn = sqlite3.connect(db_path)
+        create_interaction_table(conn.cursor())
+        # A row written as JSON text by an older version
+        conn.execute("INSERT INTO interactions (student_id, internship_id, context_vector, reward) VALUES (?, ?, ?, ?)",
+                     ("old", "legacy", json.dumps([0.5] * 50), 1.0))
+        conn.commit()
+        conn.close()
+        
+        committed = []
+        log = InteractionLog(db_path, on_commit=committed.extend)
+        
+        def write(worker):
+            for i in range(25):
+                log.append(f"student-{worker}", f"arm-{i % 5}", np.full(50, worker + i / 100, dtype=np.float32), 1.0)
+        
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.close()
+        
+        assert log.stats()["appended"] == 200 and log.commits <= 200
+        assert [row[0] for row in committed] == list(range(2, 202))  # Applied in id order
+        
+        batches = list(iter_interactions(db_path, chunk_size=64))
+        assert [len(batch) for batch in batches] == [64, 64, 64, 9]
+        contexts = np.concatenate([batch.contexts for batch in batches])
+        assert contexts.shape == (201, 50) and contexts.dtype == np.float32
+        assert np.allclose(contexts[0], 0.5)
+        by_id = {row[0]: row[2] for row in committed}
+        ids = np.concatenate([batch.ids for batch in batches])
+        assert all(np.array_equal(contexts[i], by_id[ids[i]]) for i in range(1, 201))
+        
+        assert compact(db_path) == 1
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM interactions WHERE typeof(context_vector) != 'blob'").fetchone()[0] == 0
+        conn.close()
+        
+        export_path = os.path.join(directory, "interactions.npz")
+        assert export(db_path, export_path, chunk_size=50) == 201
+        with np.load(export_path) as exported:
+            assert np.array_equal(exported["contexts"], contexts) and np.array_equal(exported["ids"], ids)
+            assert exported["internship_ids"][0] == "legacy"
+    
+    print("✅ Interaction log group-commits, streams and exports")
+
+def test_interaction_log_failures():
+    """A failing or stuck writer never blocks feedback forever, and a closed log rejects appends"""
+    print("🧪 Testing interaction log failure paths")
+    
+    import sqlite3
+    import tempfile
+    import threading
+    from interaction_log import InteractionLog, create_interaction_table
+    from sqlite_pool import ConnectionPool
+    
+    class FlakyPool(ConnectionPool):
+        """Fails to open the first connection"""
+        failures = 1
+        
+        def connection(self):
+            if self.failures:
+                self.failures -= 1
+                raise sqlite3.OperationalError("unable to open database file")
+            return super().connection()
+    
+    vector = np.ones(50, dtype=np.float32)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "learning.db")
+        conn = sqlite3.connect(db_path)
+        create_interaction_table(conn.cursor())
+        conn.commit()
+        conn.close()
+        
+        # The writer survives a connection error
+        pool = FlakyPool(db_path)
+        log = InteractionLog(db_path, pool=pool, append_timeout=5)
+        assert log.append("s", "a", vector, 1.0) is None
+        assert log.append("s", "a", vector, 1.0) == 1
+        
+        # A writer thread that died is restarted
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        log._thread = dead
+        assert log.append("s", "a", vector, 1.0) == 2
+        log.close()
+        pool.close_all()
+        
+        # A commit that does not finish in time returns None instead of hanging
+        release = threading.Event()
+        log = InteractionLog(db_path, on_commit=lambda rows: release.wait(5), append_timeout=0.2)
+        assert log.append("s", "a", vector, 1.0) is None
+        release.set()
+        log.close()
+        
+        # Appends after close are rejected, including ones racing it
+        assert log.append("s", "a", vector, 1.0) is None
+        log = InteractionLog(db_path, append_timeout=5)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(log.append("s", "a", vector, 1.0)))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        log.close()
+        for thread in threads:
+            thread.join(10)
+        assert not any(thread.is_alive() for thread in threads) and len(results) == 20
+        
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+        conn.close()
+        assert stored == 3 + sum(result is not None for result in results)
+    
+    print("✅ Interaction log recovers from writer failures and rejects appends after close")
+
+def test_sqlite_connection_pool():
+    """The learning database uses WAL, one reused connection per thread, and readers don't wait for writers"""
+    print("🧪 Testing SQLite connection pool")
+    
+    import tempfile
+    import threading
+    from matchmaking_system import LinUCBContextualBandit
+    from sqlite_pool import ConnectionPool
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "nested", "learning.db")
+        bandit = LinUCBContextualBandit(db_path=db_path, flush_interval=0)
+        bandit.update_arm("student", "arm", np.ones(50, dtype=np.float32), 1.0)
+        assert os.path.exists(db_path) and bandit.pool.journal_mode == "wal"
+        assert bandit.pool.connection() is bandit.pool.connection()
+        bandit.close()
+        
+        pool = ConnectionPool(db_path)
+        writer = pool.connection()
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO bandit_metadata (key, value) VALUES ('pending', 1)")
+        
+        # While the write transaction is open, another thread reads the last committed state
+        result = {}
+        def read():
+            conn = pool.connection()
+            result["same"] = conn is writer
+            result["count"] = conn.execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+            result["pending"] = conn.execute("SELECT COUNT(*) FROM bandit_metadata WHERE key = 'pending'").fetchone()[0]
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=2)
+        assert not reader.is_alive() and result == {"same": False, "count": 1, "pending": 0}
+        writer.commit()
+        assert len(pool) == 2
+        pool.close_all()
+    
+    print("✅ WAL connection pool serves concurrent reads")
+
+def test_offline_linucb_training():
+    """Batch retraining from the interaction log reproduces the online arms and swaps them in atomically"""
+    print("🧪 Testing offline LinUCB training")
+    
+    import sqlite3
+    import tempfile
+    from bandit_store import ArmParameters, replace_arm_table
+    from matchmaking_system import LinUCBContextualBandit
+    from train_linucb import train
+    
+    rng = np.random.default_rng(3)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "learning.db")
+        bandit = LinUCBContextualBandit(db_path=db_path, flush_interval=0, reinversion_interval=0)
+        for i in range(300):
+            bandit.update_arm("student", f"arm-{i % 7}", rng.random(50).astype(np.float32), float(rng.random() < 0.3))
+        online = {f"arm-{i}": bandit._get_arm_parameters(f"arm-{i}") for i in range(7)}
+        
+        arms, count, last_id = train(db_path, chunk_size=64)
+        assert count == 300 and last_id == 300 and set(arms) == set(online)
+        for arm_id, arm in arms.items():
+            assert np.allclose(arm.A, online[arm_id].A) and np.allclose(arm.b, online[arm_id].b)
+            assert np.allclose(arm.theta, online[arm_id].theta, atol=1e-8)
+            assert arm.updates_since_inversion == 0
+        
+        # Only part of the log: training stops at until_id
+        partial, count, last_id = train(db_path, chunk_size=64, until_id=100)
+        assert count == 100 and last_id == 100
+        bandit.arms.swap(partial, 100)  # Interactions 101-300 are replayed on top
+        assert np.allclose(bandit._get_arm_parameters("arm-3").A, online["arm-3"].A)
+        
+        # Retraining in place replays feedback applied after the snapshot and rewrites the table
+        assert bandit.retrain(chunk_size=50) == 300
+        bandit.update_arm("student", "arm-0", np.ones(50, dtype=np.float32), 1.0)
+        retrained = bandit._get_arm_parameters("arm-0")
+        assert np.allclose(retrained.A, online["arm-0"].A + 1.0)
+        bandit.close()
+        
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM arm_parameters").fetchone()[0] == 7
+        assert conn.execute("SELECT value FROM bandit_metadata WHERE key = 'flushed_interaction_id'").fetchone()[0] == 301
+        
+        # A replacement that fails part-way changes nothing, not even the side table
+        broken = ArmParameters(np.array(["not a number"]), np.zeros(50), np.eye(50), np.zeros(50))
+        try:
+            replace_arm_table(conn, {"arm-0": arms["arm-0"], "broken": broken}, 999)
+            assert False, "an arm that cannot be encoded must abort the replacement"
+        except ValueError:
+            pass
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "arm_parameters_new" not in tables
+        assert conn.execute("SELECT COUNT(*) FROM arm_parameters").fetchone()[0] == 7
+        assert conn.execute("SELECT value FROM bandit_metadata WHERE key = 'flushed_interaction_id'").fetchone()[0] == 301
+        conn.close()
+        
+        restarted = LinUCBContextualBandit(db_path=db_path, flush_interval=0)
+        assert np.allclose(restarted._get_arm_parameters("arm-0").A, retrained.A)
+        restarted.close()
+    
+    print("✅ Offline training matches online updates")
+
+def test_hybrid_linucb():
+    """Hybrid LinUCB lets cold arms borrow from feedback on other arms and rebuilds from the log"""
+    print("🧪 Testing hybrid LinUCB")
+    
+    import tempfile
+    from hybrid_linucb import HybridLinUCB
+    from matchmaking_system import LinUCBContextualBandit
+    
+    rng = np.random.default_rng(8)
+    contexts = rng.random((400, 50))
+    contexts[:, 15:] = 0  # Padding, as in real context vectors
+    arm_ids = np.array([f"arm-{i % 20}" for i in range(400)], dtype=object)
+    # Reward driven by the shared SBERT feature, the same for every arm
+    rewards = (contexts[:, 12] > 0.5).astype(np.float64)
+    
+    online = HybridLinUCB(recompute_interval=50)
+    for arm_id, context, reward in zip(arm_ids, contexts, rewards):
+        online.update(arm_id, context, reward)
+    batch = HybridLinUCB()
+    batch.fit(arm_ids, contexts, rewards)
+    assert np.allclose(online.beta, batch.beta) and np.allclose(online.A0_inv, batch.A0_inv)
+    
+    probe = contexts[:4].copy()
+    probe[:, 12] = [0.9, 0.9, 0.1, 0.1]
+    names = ["arm-1", "brand-new", "arm-1", "brand-new"]
+    scores, confidences = batch.score_batch(probe, names)
+    assert np.allclose(scores, online.score_batch(probe, names)[0])
+    expected = scores - confidences
+    assert expected[1] > expected[3]  # The cold arm already prefers a strong SBERT match
+    assert batch.stats()["parameter_bytes"] < 20 * 8 * (2 * 50 ** 2 + 2 * 50) / 10
+    
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "learning.db")
+        bandit = LinUCBContextualBandit(db_path=db_path, mode="hybrid")
+        for arm_id, context, reward in zip(arm_ids[:100], contexts[:100], rewards[:100]):
+            bandit.update_arm("student", arm_id, context.astype(np.float32), reward)
+        live = bandit.score_batch(probe.astype(np.float32), names)
+        assert bandit.stats()["mode"] == "hybrid" and bandit.stats()["arms"] == 20
+        assert bandit.retrain() == 100
+        assert np.allclose(bandit.score_batch(probe.astype(np.float32), names)[0], live[0])
+        bandit.close()
+        
+        restarted = LinUCBContextualBandit(db_path=db_path, mode="hybrid")
+        assert np.allclose(restarted.score_batch(probe.astype(np.float32), names)[0], live[0])
+        restarted.close()
+        
+        # Smaller contexts keep only the arm-feature columns they have
+        narrow = LinUCBContextualBandit(db_path=os.path.join(directory, "narrow.db"), mode="hybrid", context_dim=13)
+        narrow.update_arm("student", "arm-0", contexts[0, :13].astype(np.float32), 1.0)
+        assert narrow.hybrid.arm_dim == 2
+        assert narrow.score_batch(probe[:2, :13].astype(np.float32), ["arm-0", "arm-1"])[0].shape == (2,)
+        narrow.close()
+    
+    try:
+        HybridLinUCB(shared_dim=10)
+        assert False, "arm features outside the shared features must be rejected"
+    except ValueError:
+        pass
+    
+    print("✅ Hybrid LinUCB shares learning across arms")
+
 if __name__ == "__main__":
     success = test_matchmaking_system()
+    if success:
+        test_batched_similarity_matches_pairwise()
+        test_skill_embedding_cache()
+        test_shared_embedding_store()
+        test_skill_matching()
+        test_vector_index_retrieval()
+        test_vectorized_policy_scoring()
+        test_compiled_student_context()
+        test_policy_factor_registry()
+        test_location_index()
+        test_eligibility_prefilter()
+        test_top_k_selection()
+        test_sherman_morrison_updates()
+        test_binary_arm_storage()
+        test_write_behind_arm_store()
+        test_batch_linucb_scoring()
+        test_context_matrix()
+        test_impression_feedback()
+        test_interaction_log()
+        test_interaction_log_failures()
+        test_sqlite_connection_pool()
+        test_offline_linucb_training()
+        test_hybrid_linucb()
     sys.exit(0 if success else 1)